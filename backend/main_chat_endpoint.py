@@ -4,44 +4,176 @@ LexTimeline chat endpoint router.
 
 from __future__ import annotations
 
-import os
-from typing import Any
+from collections.abc import AsyncIterator
+from typing import Annotated, Any
 
-from fastapi import APIRouter, HTTPException, status
-from pydantic import BaseModel, Field
+import orjson
+from fastapi import APIRouter, HTTPException, Request, status
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field, ValidationError
 
-from backend.services.chat_service import chat_with_case
+from backend.services.chat_service import chat_with_case, stream_chat_with_case
+from services.openai_client import get_azure_config
 
-DEFAULT_CHAT_MODEL = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME", "gpt-4.1")
+MAX_CHAT_BODY_BYTES = 10 * 1024 * 1024  # 10 MB
+MAX_CHAT_EVENTS = 5_000
+MAX_CHAT_QUERIES = 8
+
+ChatQuery = Annotated[str, Field(min_length=1, max_length=2000)]
+ChatQueryList = Annotated[list[ChatQuery], Field(min_length=1, max_length=MAX_CHAT_QUERIES)]
 
 router = APIRouter(tags=["Chat"])
 
 
-class ChatRequest(BaseModel):
-    """Body for POST /chat."""
+class ChatMetaRequest(BaseModel):
+    """
+    The validated part of a POST /chat body.
+
+    `context` is deliberately absent: it is the full AnalysisResult, only read
+    through `.get()` by the chat service, so walking it with Pydantic on every
+    request is pure overhead. Extra keys are ignored without being validated.
+    """
 
-    query: str = Field(
+    query: ChatQuery | ChatQueryList = Field(
         ...,
-        min_length=1,
-        max_length=2000,
-        description="User natural-language question.",
+        description=(
+            "User natural-language question, or a list of up to 8 questions "
+            "about the same case answered concurrently."
+        ),
         examples=["Bu davayi kisaca ozetle."],
     )
+    model: str | None = Field(
+        default=None,
+        description=(
+            "Chat model/deployment name. Defaults to "
+            "AZURE_OPENAI_CHAT_DEPLOYMENT_NAME."
+        ),
+    )
+
+
+class ChatRequest(ChatMetaRequest):
+    """Body for POST /chat (documents the full request schema)."""
+
     context: dict[str, Any] = Field(
         ...,
         description="Full AnalysisResult JSON from a prior /analyze/deep call.",
     )
-    model: str = Field(
-        default=DEFAULT_CHAT_MODEL,
-        description="Chat model/deployment name.",
-    )
 
 
 class ChatResponse(BaseModel):
-    answer: str = Field(description="Grounded answer with [Olay #N] citations.")
+    answer: str | list[str] = Field(
+        description=(
+            "Grounded answer with [Olay #N] citations; a list in question order "
+            "when 'query' was a list."
+        ),
+    )
     model_used: str = Field(description="Model/deployment used for this answer.")
 
 
+_CHAT_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {"application/json": {"schema": ChatRequest.model_json_schema()}},
+    },
+}
+
+
+async def _read_chat_request(request: Request) -> tuple[ChatMetaRequest, dict[str, Any]]:
+    """
+    Decodes a /chat body: validates query/model, passes `context` through raw.
+
+    Oversized bodies are rejected with 413 before they are decoded, so a huge
+    or runaway payload never reaches JSON parsing or context rendering.
+    """
+    body = await _read_body_capped(request, MAX_CHAT_BODY_BYTES)
+    try:
+        payload = orjson.loads(body)
+    except orjson.JSONDecodeError as exc:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=f"Request body is not valid JSON: {exc}",
+        ) from exc
+    if not isinstance(payload, dict):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Request body must be a JSON object.",
+        )
+
+    try:
+        req = ChatMetaRequest.model_validate(payload)
+    except ValidationError as exc:
+        raise RequestValidationError(exc.errors()) from exc
+
+    context = payload.get("context")
+    if not isinstance(context, dict):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="'context' must be the AnalysisResult JSON object from /analyze/deep.",
+        )
+
+    events = context.get("events")
+    if events is not None and not isinstance(events, list):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="context.events must be a list of timeline events.",
+        )
+    if not events:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                "context.events is empty. "
+                "Run POST /analyze/deep first and pass the full result as 'context'."
+            ),
+        )
+    if len(events) > MAX_CHAT_EVENTS:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"context.events has {len(events)} items; the limit is {MAX_CHAT_EVENTS}.",
+        )
+    # Only the shape the context renderer relies on is checked; the records'
+    # own fields are read leniently with .get().
+    contradictions = context.get("contradictions", [])
+    if (
+        not all(isinstance(event, dict) for event in events)
+        or not isinstance(contradictions, list)
+        or not all(isinstance(c, dict) for c in contradictions)
+    ):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail=(
+                "'context' is not an AnalysisResult: events and contradictions "
+                "must be lists of objects."
+            ),
+        )
+
+    return req, context
+
+
+def _payload_too_large() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Request body exceeds the {MAX_CHAT_BODY_BYTES // (1024 * 1024)} MB limit.",
+    )
+
+
+async def _read_body_capped(request: Request, limit: int) -> bytes:
+    """
+    Reads the request body, failing fast on Content-Length and, for chunked
+    uploads without one, as soon as the running total passes `limit`.
+    """
+    content_length = request.headers.get("content-length")
+    if content_length is not None and content_length.isdigit() and int(content_length) > limit:
+        raise _payload_too_large()
+
+    body = bytearray()
+    async for chunk in request.stream():
+        body += chunk
+        if len(body) > limit:
+            raise _payload_too_large()
+    return bytes(body)
+
+
 @router.post(
     "/chat",
     response_model=ChatResponse,
@@ -56,22 +188,63 @@ class ChatResponse(BaseModel):
         422: {"description": "Invalid context payload."},
         503: {"description": "LLM service unavailable."},
     },
+    openapi_extra=_CHAT_REQUEST_BODY,
 )
-async def chat_endpoint(req: ChatRequest) -> ChatResponse:
-    if not req.context.get("events"):
+async def chat_endpoint(request: Request) -> ChatResponse:
+    req, context = await _read_chat_request(request)
+
+    try:
+        model = req.model or get_azure_config().chat_deployment
+        answer = await chat_with_case(
+            query=req.query,
+            context=context,
+            model=model,
+        )
+    except ValueError as exc:
         raise HTTPException(
             status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
-            detail=(
-                "context.events is empty. "
-                "Run POST /analyze/deep first and pass the full result as 'context'."
-            ),
+            detail=str(exc),
+        ) from exc
+    except Exception as exc:  # noqa: BLE001
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=f"LLM unavailable: {exc}",
+        ) from exc
+
+    return ChatResponse(answer=answer, model_used=model)
+
+
+@router.post(
+    "/chat/stream",
+    status_code=status.HTTP_200_OK,
+    summary="RAG-lite case assistant (streaming)",
+    description=(
+        "Same input as `POST /chat`, but the answer is streamed as Server-Sent "
+        "Events: `delta` events carry `{\"text\": ...}` chunks, a final `done` "
+        "event carries `{\"model_used\": ...}`, and an `error` event is sent if "
+        "the LLM fails mid-stream."
+    ),
+    responses={
+        200: {"description": "Answer stream.", "content": {"text/event-stream": {}}},
+        422: {"description": "Invalid context payload."},
+        503: {"description": "LLM service unavailable."},
+    },
+    openapi_extra=_CHAT_REQUEST_BODY,
+)
+async def chat_stream_endpoint(request: Request) -> StreamingResponse:
+    req, context = await _read_chat_request(request)
+    if not isinstance(req.query, str):
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="/chat/stream answers a single question; use POST /chat for a list.",
         )
 
     try:
-        answer = await chat_with_case(
+        model = req.model or get_azure_config().chat_deployment
+        chunks = await stream_chat_with_case(
             query=req.query,
-            context=req.context,
-            model=req.model,
+            context=context,
+            model=model,
         )
     except ValueError as exc:
         raise HTTPException(
@@ -84,5 +257,23 @@ async def chat_endpoint(req: ChatRequest) -> ChatResponse:
             detail=f"LLM unavailable: {exc}",
         ) from exc
 
-    return ChatResponse(answer=answer, model_used=req.model)
+    return StreamingResponse(
+        _sse_events(chunks, model_used=model),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
 
+
+def _sse(event: str, data: dict[str, Any]) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + orjson.dumps(data) + b"\n\n"
+
+
+async def _sse_events(chunks: AsyncIterator[str], *, model_used: str) -> AsyncIterator[bytes]:
+    try:
+        async for text in chunks:
+            yield _sse("delta", {"text": text})
+    except Exception as exc:  # noqa: BLE001
+        # Headers are already sent; report the failure in-band.
+        yield _sse("error", {"detail": f"LLM unavailable: {exc}"})
+        return
+    yield _sse("done", {"model_used": model_used})
@@ -1,16 +1,43 @@
 ﻿"""
-services/chat_service.py - RAG-lite case assistant.
+backend/services/chat_service.py - RAG-lite case assistant.
 """
 
 from __future__ import annotations
 
-import os
-from typing import Any
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections.abc import AsyncIterator, Awaitable
+from typing import Any, NamedTuple
 
+import httpx
+import orjson
 from openai import AsyncAzureOpenAI
 
-DEFAULT_CHAT_MODEL = os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME", "gpt-4.1")
-MAX_RETRIES = 2
+from services.cache import TTLCache
+from services.openai_client import get_azure_config, get_openai_client
+
+logger = logging.getLogger(__name__)
+
+CONTEXT_CACHE_SIZE = 512
+CONTEXT_CACHE_TTL_SECONDS = 30 * 60
+# Prefill latency grows with prompt size. Cap the rendered case context at
+# ~60k tokens (Turkish legal text averages ~3 chars/token) so huge cases
+# keep a predictable p99 and leave room for the answer.
+MAX_CONTEXT_CHARS = 180_000
+OFFLOAD_RENDER_MIN_RECORDS = 200  # Events + contradictions before rendering off-loop.
+_SEVERITY_RANK = {"LOW": 0, "MEDIUM": 1, "HIGH": 2}
+RESPONSE_CACHE_SIZE = 2048
+RESPONSE_CACHE_TTL_SECONDS = 60 * 60
+# Above this sampling temperature answers are meant to vary; don't replay them.
+RESPONSE_CACHE_MAX_TEMPERATURE = 0.5
+STREAM_FLUSH_INTERVAL_SECONDS = 0.02  # Coalesce token deltas before each flush.
+# Per-request override of the shared client's timeout, which is sized for
+# minutes-long timeline extractions: chat fails fast on connect/pool waits and
+# gives up on an answer after a minute.
+CHAT_TIMEOUT = httpx.Timeout(connect=3.0, read=60.0, write=10.0, pool=5.0)
 
 _SYSTEM_PROMPT = """\
 Sen, Turk hukuk sisteminde uzman bir yapay zeka dava asistanisin.
@@ -23,100 +50,382 @@ celiskiler) tek gercek kaynak olarak kullanarak sorulari yanitla.
 3. Tum yanitlarini Turkce ver; HMK / TBK / CMK maddelerine uygunsa atifta bulun.
 4. Spekulasyon, tahmin veya baglam disi bilgi verme.
 5. Cevaplarin ozlu, net ve hukuki acidan degerli olsun.
+"""
 
+# Kept in its own system message *after* the static rules above, so every
+# request shares a byte-identical prefix and Azure prompt caching can hit.
+_CONTEXT_PROMPT = """\
 == DAVA BAGLAMI ==
 {context}
 """
+# Split once so each request is two concatenations instead of a str.format
+# parse of the template.
+_CONTEXT_PREFIX, _CONTEXT_SUFFIX = _CONTEXT_PROMPT.split("{context}")
 
 
-def _get_openai_client() -> AsyncAzureOpenAI:
-    api_key = os.getenv("AZURE_OPENAI_API_KEY")
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    api_version = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
+# Rendered DAVA BAGLAMI contexts, keyed by context fingerprint. Multi-turn chat
+# on one case sends the same AnalysisResult every turn.
+_context_cache = TTLCache(CONTEXT_CACHE_SIZE, CONTEXT_CACHE_TTL_SECONDS)
 
-    if not api_key or not endpoint:
-        raise ValueError(
-            "AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT must be set for /chat."
-        )
+# Final answers keyed by (context fingerprint, model, temperature, max_tokens,
+# normalized question). "Ozetle.", "ozetle" and "  OZETLE? " all map to one entry; a
+# changed AnalysisResult has a new fingerprint, so stale answers never match.
+_response_cache = TTLCache(RESPONSE_CACHE_SIZE, RESPONSE_CACHE_TTL_SECONDS)
 
-    return AsyncAzureOpenAI(
-        api_key=api_key,
-        azure_endpoint=endpoint,
-        api_version=api_version,
-        max_retries=MAX_RETRIES,
-    )
+# Only sentence-final punctuation is dropped: operators and symbols inside the
+# question ("> 5000", "#3", "%50") can change its meaning.
+_TRAILING_PUNCTUATION_RE = re.compile(r"[\s?.!]+$")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Completions currently awaiting Azure, keyed by
+# (context fingerprint, model, query, temperature, max_tokens).
+_inflight: dict[tuple[str, str, str, float, int], asyncio.Future[str]] = {}
+
+
+class _RenderedContext(NamedTuple):
+    """
+    A rendered AnalysisResult: the full text plus the per-record blocks it was
+    assembled from, so a subset (e.g. top-K events) can be re-assembled
+    without re-rendering anything.
+    """
+
+    header: str
+    event_blocks: list[str]
+    contradiction_blocks: list[str]
+    text: str
+
+
+def _context_fingerprint(ctx: dict[str, Any]) -> str:
+    """
+    Returns a stable digest of the AnalysisResult payload (key-order independent).
+    """
+    payload = orjson.dumps(ctx, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS)
+    return hashlib.blake2b(payload, digest_size=16).hexdigest()
+
+
+async def _get_context_str(ctx: dict[str, Any]) -> tuple[str, str]:
+    """
+    Returns (fingerprint, rendered context), rendering only on a cache miss.
+
+    Large contexts are rendered in a worker thread so a cold render does not
+    stall other requests on this event loop; small ones are cheaper to render
+    inline than to hand off.
+    """
+    key = _context_fingerprint(ctx)
+    rendered = _context_cache.get(key)
+    if rendered is None:
+        record_count = len(ctx.get("events", ())) + len(ctx.get("contradictions", ()))
+        if record_count >= OFFLOAD_RENDER_MIN_RECORDS:
+            rendered = await asyncio.to_thread(_render_context, ctx)
+        else:
+            rendered = _render_context(ctx)
+        _context_cache.set(key, rendered)
+    return key, rendered.text
 
 
 def _build_context_str(ctx: dict[str, Any]) -> str:
     """
     Converts flat AnalysisResult into a compact text context for the chat model.
     """
+    return _render_context(ctx).text
+
+
+def _render_context(ctx: dict[str, Any]) -> _RenderedContext:
     events = ctx.get("events", [])
     contras = ctx.get("contradictions", [])
 
-    lines: list[str] = [
-        f"Risk Seviyesi  : {ctx.get('risk_level', 'NONE')}",
-        f"Toplam Olay    : {len(events)}",
-        f"Toplam Celiski : {len(contras)}",
-        f"Belge Ozeti    : {ctx.get('document_summary', 'Yok')}",
-        "",
-        "--- OLAYLAR ---",
-    ]
+    header = (
+        f"Risk Seviyesi  : {ctx.get('risk_level', 'NONE')}\n"
+        f"Toplam Olay    : {len(events)}\n"
+        f"Toplam Celiski : {len(contras)}\n"
+        f"Belge Ozeti    : {ctx.get('document_summary', 'Yok')}\n"
+        "\n"
+        "--- OLAYLAR ---"
+    )
+    event_blocks = _render_events(events)
+    contradiction_blocks = _render_contradictions(contras)
+    text = _assemble_context(header, event_blocks, contradiction_blocks)
+    if len(text) > MAX_CONTEXT_CHARS:
+        text = _fit_context_budget(
+            header, event_blocks, contradiction_blocks, contras, MAX_CONTEXT_CHARS
+        )
+    return _RenderedContext(
+        header=header,
+        event_blocks=event_blocks,
+        contradiction_blocks=contradiction_blocks,
+        text=text,
+    )
+
 
-    for i, ev in enumerate(events):
-        entities = ", ".join(ev.get("entities", [])) or "Belirtilmemis"
-        lines += [
-            "",
-            f"[Olay #{i + 1}]  Tarih: {ev.get('date', '?')}  |  Kategori: {ev.get('category', '?')}",
-            f"  Aciklama   : {ev.get('description', '')}",
-            f"  Taraflar   : {entities}",
-            f"  Hukuki Onem: {ev.get('significance', 'Belirtilmemis')}",
-        ]
-
-    lines += ["", "--- CELISKILER ---"]
-
-    for i, c in enumerate(contras):
-        refs = " | ".join(f"Olay #{eid + 1}" for eid in c.get("involved_event_ids", []))
-        contradiction_type = c.get("contradiction_type") or c.get("type") or "?"
-        lines += [
-            "",
-            f"[Celiski #{i + 1}]  Tur: {contradiction_type}  |  Onem: {c.get('severity', '?')}",
-            f"  Baslik     : {c.get('title', '')}",
-            f"  Aciklama   : {c.get('description', '')}",
-            f"  Ilgili     : {refs or 'Belirtilmemis'}",
-            f"  Hukuki Dayanak: {c.get('legal_basis', 'Belirtilmemis')}",
-            f"  Tavsiye    : {c.get('recommended_action', 'Belirtilmemis')}",
-        ]
-
-    return "\n".join(lines)
+def _fit_context_budget(
+    header: str,
+    event_blocks: list[str],
+    contradiction_blocks: list[str],
+    contras: list[dict[str, Any]],
+    max_chars: int,
+) -> str:
+    """
+    Drops blocks until the assembled context fits in `max_chars`.
+
+    Lowest-severity contradictions go first (later ones before earlier ones
+    within a severity), then the oldest events. Kept blocks retain their
+    original [Olay #N] / [Celiski #N] numbers, and a warning line tells the
+    model that the context was cut.
+    """
+    warning_reserve = 200
+    total = len(_assemble_context(header, event_blocks, contradiction_blocks)) + warning_reserve
+
+    dropped_contras: set[int] = set()
+    contra_order = sorted(
+        range(len(contradiction_blocks)),
+        key=lambda i: (_SEVERITY_RANK.get(contras[i].get("severity"), 0), -i),
+    )
+    for i in contra_order:
+        if total <= max_chars:
+            break
+        dropped_contras.add(i)
+        total -= len(contradiction_blocks[i]) + 2
+
+    dropped_events = 0
+    while total > max_chars and dropped_events < len(event_blocks):
+        total -= len(event_blocks[dropped_events]) + 2
+        dropped_events += 1
+
+    logger.warning(
+        "Chat context exceeds %d chars. Dropped %d/%d events and %d/%d contradictions.",
+        max_chars,
+        dropped_events,
+        len(event_blocks),
+        len(dropped_contras),
+        len(contradiction_blocks),
+    )
+
+    notice = (
+        f"[UYARI: Baglam siniri nedeniyle en eski {dropped_events} olay ve "
+        f"en dusuk onemli {len(dropped_contras)} celiski baglamdan cikarildi.]"
+    )
+    kept_contras = [b for i, b in enumerate(contradiction_blocks) if i not in dropped_contras]
+    return _assemble_context(
+        f"{header}\n{notice}",
+        event_blocks[dropped_events:],
+        kept_contras,
+    )
+
+
+def _assemble_context(
+    header: str,
+    event_blocks: list[str],
+    contradiction_blocks: list[str],
+) -> str:
+    return "\n\n".join([header, *event_blocks, "--- CELISKILER ---", *contradiction_blocks])
+
+
+def _render_events(events: list[dict[str, Any]]) -> list[str]:
+    """
+    Renders one text block per event; block i is cited as [Olay #i+1].
+    """
+    blocks: list[str] = []
+    for i, ev in enumerate(events, start=1):
+        ev_get = ev.get
+        # Joined once per event at render time; the block is cached with it.
+        entities = ", ".join(ev_get("entities") or ()) or "Belirtilmemis"
+        blocks.append(
+            f"[Olay #{i}]  Tarih: {ev_get('date', '?')}  |  Kategori: {ev_get('category', '?')}\n"
+            f"  Aciklama   : {ev_get('description', '')}\n"
+            f"  Taraflar   : {entities}\n"
+            f"  Hukuki Onem: {ev_get('significance', 'Belirtilmemis')}"
+        )
+    return blocks
+
+
+def _render_contradictions(contras: list[dict[str, Any]]) -> list[str]:
+    """
+    Renders one text block per contradiction; block i is cited as [Celiski #i+1].
+    """
+    blocks: list[str] = []
+    for i, c in enumerate(contras, start=1):
+        c_get = c.get
+        refs = " | ".join(f"Olay #{eid + 1}" for eid in c_get("involved_event_ids") or ())
+        contradiction_type = c_get("contradiction_type") or c_get("type") or "?"
+        blocks.append(
+            f"[Celiski #{i}]  Tur: {contradiction_type}  |  Onem: {c_get('severity', '?')}\n"
+            f"  Baslik     : {c_get('title', '')}\n"
+            f"  Aciklama   : {c_get('description', '')}\n"
+            f"  Ilgili     : {refs or 'Belirtilmemis'}\n"
+            f"  Hukuki Dayanak: {c_get('legal_basis', 'Belirtilmemis')}\n"
+            f"  Tavsiye    : {c_get('recommended_action', 'Belirtilmemis')}"
+        )
+    return blocks
 
 
 async def chat_with_case(
-    query: str,
+    query: str | list[str],
     context: dict[str, Any],
     *,
     model: str | None = None,
     temperature: float = 0.3,
     max_tokens: int = 1500,
-) -> str:
+) -> str | list[str]:
     """
     Send a grounded query to Azure OpenAI with AnalysisResult as context.
+
+    A list of questions is answered concurrently against the same rendered
+    context (and cached prompt prefix), returning answers in input order.
+    Identical concurrent questions (same case, query, model and sampling
+    settings) share one in-flight completion instead of each paying for
+    its own Azure round-trip.
     """
-    resolved_model = model or DEFAULT_CHAT_MODEL
-    client = _get_openai_client()
+    resolved_model = model or get_azure_config().chat_deployment
+    client = get_openai_client()
 
-    context_str = _build_context_str(context)
-    system_prompt = _SYSTEM_PROMPT.format(context=context_str)
+    cache_key, context_str = await _get_context_str(context)
 
-    completion = await client.chat.completions.create(
+    def ask(q: str) -> Awaitable[str]:
+        return _ask(
+            client,
+            query=q,
+            context_str=context_str,
+            cache_key=cache_key,
+            model=resolved_model,
+            temperature=temperature,
+            max_tokens=max_tokens,
+        )
+
+    if isinstance(query, str):
+        return await ask(query)
+    return list(await asyncio.gather(*(ask(q) for q in query)))
+
+
+async def _ask(
+    client: AsyncAzureOpenAI,
+    *,
+    query: str,
+    context_str: str,
+    cache_key: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    response_key: str | None = None
+    if temperature <= RESPONSE_CACHE_MAX_TEMPERATURE:
+        response_key = "\x1f".join(
+            (cache_key, model, str(temperature), str(max_tokens), _normalize_query(query))
+        )
+        cached = _response_cache.get(response_key)
+        if cached is not None:
+            return cached
+
+    flight_key = (cache_key, model, query, temperature, max_tokens)
+    task = _inflight.get(flight_key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _complete(
+                client,
+                query=query,
+                context_str=context_str,
+                cache_key=cache_key,
+                model=model,
+                temperature=temperature,
+                max_tokens=max_tokens,
+            )
+        )
+        _inflight[flight_key] = task
+        task.add_done_callback(lambda _t: _inflight.pop(flight_key, None))
+
+    # Shield so one caller disconnecting does not cancel the answer for the rest.
+    answer = await asyncio.shield(task)
+    if response_key is not None and answer:
+        _response_cache.set(response_key, answer)
+    return answer
+
+
+def _normalize_query(query: str) -> str:
+    """
+    Folds case, whitespace and trailing sentence punctuation so trivially
+    different spellings of the same question share a response-cache entry.
+    """
+    folded = _WHITESPACE_RE.sub(" ", query.casefold()).strip()
+    return _TRAILING_PUNCTUATION_RE.sub("", folded)
+
+
+async def stream_chat_with_case(
+    query: str,
+    context: dict[str, Any],
+    *,
+    model: str | None = None,
+    temperature: float = 0.3,
+    max_tokens: int = 1500,
+) -> AsyncIterator[str]:
+    """
+    Streaming variant of `chat_with_case`.
+
+    The Azure request is opened before returning, so configuration and API
+    errors raise here (not mid-stream). The returned iterator yields answer
+    text in chunks, flushing at most every STREAM_FLUSH_INTERVAL_SECONDS so
+    the ASGI layer is not driven once per token.
+    """
+    resolved_model = model or get_azure_config().chat_deployment
+    client = get_openai_client()
+
+    cache_key, context_str = await _get_context_str(context)
+
+    stream = await client.chat.completions.create(
         model=resolved_model,
         temperature=temperature,
         max_tokens=max_tokens,
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": query},
-        ],
+        messages=_build_messages(query, context_str),
+        extra_body={"prompt_cache_key": cache_key},
+        stream=True,
+        timeout=CHAT_TIMEOUT,
     )
+    return _batch_deltas(stream)
+
+
+async def _batch_deltas(stream: Any) -> AsyncIterator[str]:
+    pending: list[str] = []
+    last_flush = time.monotonic()
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        pending.append(delta)
+        now = time.monotonic()
+        if now - last_flush >= STREAM_FLUSH_INTERVAL_SECONDS:
+            yield "".join(pending)
+            pending.clear()
+            last_flush = now
+    if pending:
+        yield "".join(pending)
 
-    return (completion.choices[0].message.content or "").strip()
 
+def _build_messages(query: str, context_str: str) -> list[dict[str, str]]:
+    return [
+        {"role": "system", "content": _SYSTEM_PROMPT},
+        {"role": "system", "content": _CONTEXT_PREFIX + context_str + _CONTEXT_SUFFIX},
+        {"role": "user", "content": query},
+    ]
+
+
+async def _complete(
+    client: AsyncAzureOpenAI,
+    *,
+    query: str,
+    context_str: str,
+    cache_key: str,
+    model: str,
+    temperature: float,
+    max_tokens: int,
+) -> str:
+    completion = await client.chat.completions.create(
+        model=model,
+        temperature=temperature,
+        max_tokens=max_tokens,
+        messages=_build_messages(query, context_str),
+        # Routes repeat questions about the same case to the same cache shard.
+        extra_body={"prompt_cache_key": cache_key},
+        timeout=CHAT_TIMEOUT,
+    )
+
+    return (completion.choices[0].message.content or "").strip()
@@ -13,35 +13,63 @@ Endpoints:
     POST /analyze/deep   — Phase 1 + 2: PDF → timeline + contradiction analysis
 """
 
+import asyncio
+import hashlib
 import logging
 import time
+from collections.abc import AsyncIterator
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
 from pathlib import Path
+from typing import Optional, Union
 
+import orjson
 from dotenv import load_dotenv
-from fastapi import FastAPI, File, HTTPException, Request, UploadFile, status
+from fastapi import FastAPI, File, HTTPException, Query, Request, UploadFile, status
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import (
+    FileResponse,
+    JSONResponse,
+    ORJSONResponse,
+    Response,
+    StreamingResponse,
+)
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from pydantic import BaseModel
 
 from backend.main_chat_endpoint import router as chat_router
-from models import AnalysisResult, TimelineResponse
-from services.llm_extractor import extract_timeline
-from services.logic_analyzer import detect_contradictions
+from models import (
+    AnalysisResult,
+    Contradiction,
+    LogicAnalysisResult,
+    TimelineEvent,
+    TimelineResponse,
+)
+from services import openai_client
+from services.cache import TTLCache
+from services.llm_extractor import extract_timeline, extract_timeline_stream
+from services.logic_analyzer import detect_contradictions, detect_contradictions_stream
+from services import pdf_parser
 from services.pdf_parser import PDFParsingError, build_prompt_text, extract_text_by_page
 
 # ---------------------------------------------------------------------------
 # Bootstrap
 # ---------------------------------------------------------------------------
 
-load_dotenv()
+def _configure_runtime() -> None:
+    """
+    Loads .env and configures logging. Called from `lifespan` rather than at
+    import time, so importing `main` (tests, tooling, workers) has no global
+    side effects. The Azure clients read their credentials lazily, after this.
+    """
+    load_dotenv()
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
+        datefmt="%Y-%m-%dT%H:%M:%S",
+    )
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)-8s | %(name)s | %(message)s",
-    datefmt="%Y-%m-%dT%H:%M:%S",
-)
 logger = logging.getLogger("lextimeline.main")
 
 # ---------------------------------------------------------------------------
@@ -49,17 +77,73 @@ logger = logging.getLogger("lextimeline.main")
 # ---------------------------------------------------------------------------
 
 MAX_FILE_SIZE_BYTES = 50 * 1024 * 1024  # 50 MB
-ALLOWED_MIME_TYPES = {"application/pdf"}
+UPLOAD_CHUNK_BYTES = 1024 * 1024  # 1 MB
+# Every PDF starts with this header; readers tolerate up to 1 KB of junk before it.
+PDF_MAGIC = b"%PDF-"
+PDF_MAGIC_WINDOW = 1024
 APP_VERSION = "1.1.0"
 
+# Built frontend (npm run build). Resolved once; served by the "/" mount below.
+_dist = Path(__file__).parent / "dist"
+_SPA_INDEX = _dist / "index.html"
+_SPA_BUILT = _SPA_INDEX.exists()
+
+# PyMuPDF is not thread-safe ("no Python threading support"), so all PDF work
+# runs on one dedicated worker thread: the event loop stays free for other
+# requests while documents are parsed one at a time.
+_pdf_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf-parser")
+
+# Finished LLM results, keyed by content hash. Re-uploads of the same PDF
+# (frontend retries, shared links) skip the parse and both LLM roundtrips.
+# APP_VERSION is part of every key so a release with new prompts starts cold.
+ANALYSIS_CACHE_SIZE = 256
+ANALYSIS_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # 7 days
+_timeline_cache = TTLCache(ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL_SECONDS)
+_logic_cache = TTLCache(ANALYSIS_CACHE_SIZE, ANALYSIS_CACHE_TTL_SECONDS)
+
+# Built prompt texts, keyed like the timeline cache. A retry after a failed
+# extraction skips the PDF parse and page selection. Short-lived: prompts are
+# large and only matter until the timeline itself is cached.
+PROMPT_CACHE_SIZE = 32
+PROMPT_CACHE_TTL_SECONDS = 60 * 60
+_prompt_cache = TTLCache(PROMPT_CACHE_SIZE, PROMPT_CACHE_TTL_SECONDS)
+
 # ---------------------------------------------------------------------------
 # Lifespan
 # ---------------------------------------------------------------------------
 
+async def _warm_up(app: FastAPI) -> None:
+    """
+    Moves first-request costs to startup: the TLS handshake to Azure, the PDF
+    worker thread and MuPDF, and the OpenAPI schema behind /docs. Runs in the
+    background, so startup never waits on the network.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        await asyncio.gather(
+            openai_client.warm_up_connection(),
+            loop.run_in_executor(_pdf_executor, pdf_parser.warm_up),
+        )
+        app.openapi()
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("Start-up warm-up failed (first requests will be slower): %s", exc)
+
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
+    _configure_runtime()
     logger.info("LexTimeline v%s starting up…", APP_VERSION)
+    # Build the shared Azure client now (snapshotting the settings .env just
+    # provided), so misconfiguration surfaces in the startup log rather than
+    # on the first /chat or /analyze call.
+    try:
+        openai_client.get_openai_client()
+    except ValueError as exc:
+        logger.warning("Azure OpenAI client not configured: %s", exc)
+    warm_up = asyncio.create_task(_warm_up(app))
     yield
+    warm_up.cancel()
+    await openai_client.close_openai_client()
     logger.info("LexTimeline shutting down. Goodbye.")
 
 
@@ -80,6 +164,7 @@ app = FastAPI(
     ),
     version=APP_VERSION,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -100,16 +185,29 @@ app.add_middleware(
 )
 
 
+# Load-balancer probes and static assets are too frequent to be worth a line.
+_UNLOGGED_PATHS = frozenset({"/health"})
+_UNLOGGED_PREFIXES = ("/assets/",)
+
+
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
-    """Logs method, path, status code, and elapsed time for every request."""
-    start = time.perf_counter()
+    """Logs method, path, status code, and elapsed time for API requests."""
+    path = request.url.path
+    if (
+        path in _UNLOGGED_PATHS
+        or path.startswith(_UNLOGGED_PREFIXES)
+        or not logger.isEnabledFor(logging.INFO)
+    ):
+        return await call_next(request)
+
+    start = time.perf_counter_ns()
     response = await call_next(request)
-    elapsed_ms = (time.perf_counter() - start) * 1000
+    elapsed_ms = (time.perf_counter_ns() - start) // 1_000_000
     logger.info(
-        "%s %s → %d  (%.1f ms)",
+        "%s %s → %d  (%d ms)",
         request.method,
-        request.url.path,
+        path,
         response.status_code,
         elapsed_ms,
     )
@@ -142,53 +240,107 @@ async def value_error_handler(request: Request, exc: ValueError):
 
 async def _validate_and_read_pdf(file: UploadFile) -> bytes:
     """
-    Validates the uploaded file (MIME type + size) and returns its raw bytes.
+    Validates the uploaded file (PDF header + size) and returns its raw bytes.
+
+    The file type is decided by the `%PDF-` magic bytes in the first chunk,
+    not by the client-supplied Content-Type, so a mislabeled upload is
+    rejected before anything else is read and never reaches PyMuPDF.
 
     Raises:
-        HTTPException 400: Invalid content type or empty file.
+        HTTPException 400: Not a PDF, or empty file.
         HTTPException 413: File exceeds the 50 MB limit.
     """
-    if file.content_type not in ALLOWED_MIME_TYPES:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=(
-                f"Invalid file type '{file.content_type}'. "
-                "Only 'application/pdf' files are accepted."
-            ),
-        )
-
-    file_bytes = await file.read()
+    # Reject on the size Starlette already knows, then read in chunks so an
+    # oversized spool is never copied into memory past the limit.
+    if file.size is not None and file.size > MAX_FILE_SIZE_BYTES:
+        raise _file_too_large(file.size)
 
-    if not file_bytes:
+    first_chunk = await file.read(UPLOAD_CHUNK_BYTES)
+    if not first_chunk:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Uploaded file is empty. Please upload a valid PDF.",
         )
-
-    if len(file_bytes) > MAX_FILE_SIZE_BYTES:
-        size_mb = len(file_bytes) / (1024 * 1024)
+    if PDF_MAGIC not in first_chunk[:PDF_MAGIC_WINDOW]:
         raise HTTPException(
-            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            status_code=status.HTTP_400_BAD_REQUEST,
             detail=(
-                f"File size ({size_mb:.1f} MB) exceeds the 50 MB limit. "
-                "Please split the document into smaller sections."
+                f"Invalid file type '{file.content_type}'. "
+                "Only PDF files are accepted."
             ),
         )
 
-    return file_bytes
+    buf = bytearray(first_chunk)
+    while chunk := await file.read(UPLOAD_CHUNK_BYTES):
+        if len(buf) + len(chunk) > MAX_FILE_SIZE_BYTES:
+            raise _file_too_large(file.size or len(buf) + len(chunk))
+        buf += chunk
+
+    return bytes(buf)
+
+
+def _file_too_large(size_bytes: int) -> HTTPException:
+    size_mb = size_bytes / (1024 * 1024)
+    return HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=(
+            f"File size ({size_mb:.1f} MB) exceeds the 50 MB limit. "
+            "Please split the document into smaller sections."
+        ),
+    )
+
+
+def _model_response(model: BaseModel) -> Response:
+    """
+    Serializes a response model straight to JSON bytes with pydantic-core,
+    skipping FastAPI's response_model re-validation and jsonable_encoder pass.
+    `response_model` stays on the routes for the OpenAPI schema.
+    """
+    return Response(content=model.model_dump_json(), media_type="application/json")
+
+
+def _timeline_cache_key(file_bytes: bytes, max_pages: Optional[int]) -> str:
+    """Cache key for the timeline of a PDF: SHA-256 of the uploaded bytes + page cap."""
+    digest = hashlib.sha256(file_bytes).hexdigest()
+    return f"v{APP_VERSION}:timeline:{digest}:{max_pages or 'all'}"
+
 
+def _logic_cache_key(timeline: TimelineResponse) -> str:
+    """Cache key for the contradiction analysis: SHA-256 of the timeline content."""
+    digest = hashlib.sha256(timeline.model_dump_json().encode("utf-8")).hexdigest()
+    return f"v{APP_VERSION}:logic:{digest}"
 
-async def _parse_pdf_to_prompt(file_bytes: bytes, filename: str) -> str:
+
+async def _parse_pdf_to_prompt(
+    file_bytes: bytes,
+    filename: str,
+    max_pages: Optional[int] = None,
+    *,
+    cache_key: str,
+) -> str:
     """
-    Runs the PDF parser and builds the LLM prompt string.
-    Logs progress at each step.
+    Runs the PDF parser (off the event loop) and builds the LLM prompt string.
+    Logs progress at each step. Results are cached under `cache_key`.
+
+    Every caller sends the result straight to the LLM, so the Azure connection
+    is warmed up while the parser thread works.
     """
-    pages = extract_text_by_page(file_bytes)
+    cached = _prompt_cache.get(cache_key)
+    if cached is not None:
+        logger.info("'%s': prompt text cache hit (%d chars).", filename, len(cached))
+        return cached
+
+    loop = asyncio.get_running_loop()
+    pages, _ = await asyncio.gather(
+        loop.run_in_executor(_pdf_executor, extract_text_by_page, file_bytes, max_pages),
+        openai_client.warm_up_connection(),
+    )
     logger.info("'%s': %d pages with text extracted.", filename, len(pages))
 
     prompt_text = build_prompt_text(pages, max_chars=120_000)
     logger.info("'%s': prompt text is %d chars.", filename, len(prompt_text))
 
+    _prompt_cache.set(cache_key, prompt_text)
     return prompt_text
 
 
@@ -199,17 +351,19 @@ async def _parse_pdf_to_prompt(file_bytes: bytes, filename: str) -> str:
 @app.get("/", tags=["Health"])
 async def root():
     """Serves the frontend if built, otherwise returns health check JSON."""
-    index = Path(__file__).parent / "dist" / "index.html"
-    if index.exists():
-        return FileResponse(index)
+    if _SPA_BUILT:
+        return FileResponse(_SPA_INDEX)
     return {
         "service": "LexTimeline API",
         "version": APP_VERSION,
         "status": "online",
         "endpoints": {
             "timeline_only": "POST /analyze",
+            "timeline_stream": "POST /analyze/stream",
             "deep_analysis": "POST /analyze/deep",
+            "deep_analysis_stream": "POST /analyze/deep/stream",
             "chat": "POST /chat",
+            "chat_stream": "POST /chat/stream",
             "docs": "/docs",
         },
     }
@@ -248,7 +402,10 @@ async def health_check():
 )
 async def analyze_document(
     file: UploadFile = File(..., description="A PDF legal document. Max 50 MB."),
-) -> TimelineResponse:
+    max_pages: Optional[int] = Query(
+        None, ge=1, description="Only analyze the first N pages. Default: all pages."
+    ),
+) -> Response:
     """
     Phase 1 pipeline:
       PDF bytes → PyMuPDF text extraction → GPT-4.1 Structured Output → TimelineResponse
@@ -256,7 +413,15 @@ async def analyze_document(
     file_bytes = await _validate_and_read_pdf(file)
     logger.info("'/analyze' received '%s' (%.2f MB).", file.filename, len(file_bytes) / 1e6)
 
-    prompt_text = await _parse_pdf_to_prompt(file_bytes, file.filename or "unknown")
+    cache_key = _timeline_cache_key(file_bytes, max_pages)
+    cached = _timeline_cache.get(cache_key)
+    if cached is not None:
+        logger.info("'/analyze' cache hit for '%s'.", file.filename)
+        return _model_response(cached)
+
+    prompt_text = await _parse_pdf_to_prompt(
+        file_bytes, file.filename or "unknown", max_pages, cache_key=cache_key
+    )
 
     try:
         timeline = await extract_timeline(document_text=prompt_text)
@@ -269,8 +434,88 @@ async def analyze_document(
             detail="AI service error. Please retry or check your OpenAI API key and quota.",
         ) from exc
 
+    _timeline_cache.set(cache_key, timeline)
     logger.info("'/analyze' complete: %d events extracted.", timeline.total_events_found)
-    return timeline
+    return _model_response(timeline)
+
+
+@app.post(
+    "/analyze/stream",
+    status_code=status.HTTP_200_OK,
+    summary="Extract the timeline of a legal PDF, streamed event by event",
+    description=(
+        "Same input and pipeline as `POST /analyze`, but the result is streamed as "
+        "Server-Sent Events so the UI can render the timeline progressively: one "
+        "`event` per TimelineEvent as soon as the model has written it, then a final "
+        "`done` event carrying the complete, validated TimelineResponse, or an "
+        "`error` event if extraction fails mid-stream."
+    ),
+    tags=["Analysis"],
+    responses={
+        200: {"description": "Timeline event stream.", "content": {"text/event-stream": {}}},
+        400: {"description": "Invalid file type or empty file."},
+        413: {"description": "File exceeds 50 MB limit."},
+        422: {"description": "PDF parsing error."},
+    },
+)
+async def analyze_document_stream(
+    file: UploadFile = File(..., description="A PDF legal document. Max 50 MB."),
+    max_pages: Optional[int] = Query(
+        None, ge=1, description="Only analyze the first N pages. Default: all pages."
+    ),
+) -> StreamingResponse:
+    file_bytes = await _validate_and_read_pdf(file)
+    logger.info("'/analyze/stream' received '%s' (%.2f MB).", file.filename, len(file_bytes) / 1e6)
+
+    cache_key = _timeline_cache_key(file_bytes, max_pages)
+    cached = _timeline_cache.get(cache_key)
+    if cached is not None:
+        logger.info("'/analyze/stream' cache hit for '%s'.", file.filename)
+        items: AsyncIterator[Union[TimelineEvent, TimelineResponse]] = _replay_timeline(cached)
+    else:
+        prompt_text = await _parse_pdf_to_prompt(
+            file_bytes, file.filename or "unknown", max_pages, cache_key=cache_key
+        )
+        items = extract_timeline_stream(document_text=prompt_text)
+
+    return StreamingResponse(
+        _timeline_sse_events(items, cache_key=cache_key),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _replay_timeline(
+    timeline: TimelineResponse,
+) -> AsyncIterator[Union[TimelineEvent, TimelineResponse]]:
+    """Yields a cached timeline in the shape `extract_timeline_stream` produces."""
+    for event in timeline.events:
+        yield event
+    yield timeline
+
+
+def _sse(event: str, data: bytes) -> bytes:
+    return b"event: " + event.encode() + b"\ndata: " + data + b"\n\n"
+
+
+async def _timeline_sse_events(
+    items: AsyncIterator[Union[TimelineEvent, TimelineResponse]],
+    *,
+    cache_key: str,
+) -> AsyncIterator[bytes]:
+    try:
+        async for item in items:
+            if isinstance(item, TimelineResponse):
+                _timeline_cache.set(cache_key, item)
+                yield _sse("done", item.model_dump_json().encode())
+            else:
+                yield _sse("event", item.model_dump_json().encode())
+    except ValueError as exc:
+        # Headers are already sent; report the failure in-band.
+        yield _sse("error", orjson.dumps({"detail": str(exc)}))
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Unexpected LLM error in /analyze/stream: %s", exc, exc_info=True)
+        yield _sse("error", orjson.dumps({"detail": "AI service error. Please retry."}))
 
 
 # ---------------------------------------------------------------------------
@@ -308,7 +553,10 @@ async def analyze_document(
 )
 async def analyze_document_deep(
     file: UploadFile = File(..., description="A PDF legal document. Max 50 MB."),
-) -> AnalysisResult:
+    max_pages: Optional[int] = Query(
+        None, ge=1, description="Only analyze the first N pages. Default: all pages."
+    ),
+) -> Response:
     """
     Full pipeline (3 sequential steps):
 
@@ -328,35 +576,25 @@ async def analyze_document_deep(
     file_bytes = await _validate_and_read_pdf(file)
     logger.info("'/analyze/deep' received '%s' (%.2f MB).", file.filename, len(file_bytes) / 1e6)
 
-    # ── Step 1: PDF → text ────────────────────────────────────────────────────
-    prompt_text = await _parse_pdf_to_prompt(file_bytes, file.filename or "unknown")
-
-    # ── Step 2: text → timeline ───────────────────────────────────────────────
-    try:
-        logger.info("Step 2/3: Running timeline extraction…")
-        timeline = await extract_timeline(document_text=prompt_text)
-        logger.info(
-            "Step 2/3 complete: %d events extracted.",
-            timeline.total_events_found,
-        )
-    except ValueError as exc:
-        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
-    except Exception as exc:
-        logger.error("LLM error during timeline extraction in /analyze/deep: %s", exc, exc_info=True)
-        raise HTTPException(
-            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-            detail="AI service error during timeline extraction. Please retry.",
-        ) from exc
+    # ── Steps 1-2: PDF → text → timeline (skipped on a cache hit) ─────────────
+    timeline = await _deep_timeline(file_bytes, file.filename or "unknown", max_pages)
 
     # ── Step 3: timeline → contradiction analysis ─────────────────────────────
+    logic_key = _logic_cache_key(timeline)
+    logic_result = _logic_cache.get(logic_key)
     try:
-        logger.info("Step 3/3: Running contradiction analysis on %d events…", len(timeline.events))
-        logic_result = await detect_contradictions(timeline=timeline)
-        logger.info(
-            "Step 3/3 complete: %d contradictions found. Risk level: %s.",
-            logic_result.total_contradictions_found,
-            logic_result.risk_level,
-        )
+        if logic_result is not None:
+            logger.info("Step 3/3: contradiction cache hit.")
+        else:
+            logger.info("Step 3/3: Running contradiction analysis on %d events…", len(timeline.events))
+            logic_result = await detect_contradictions(timeline=timeline)
+            logger.info(
+                "Step 3/3 complete: %d contradictions found. Risk level: %s.",
+                logic_result.total_contradictions_found,
+                logic_result.risk_level.value,
+            )
+            # Only successful analyses are cached; degraded results below are not.
+            _logic_cache.set(logic_key, logic_result)
     except ValueError as exc:
         raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
     except Exception as exc:
@@ -369,7 +607,6 @@ async def analyze_document_deep(
             exc,
             exc_info=True,
         )
-        from models import LogicAnalysisResult  # local import to avoid circular issues at module level
         logic_result = LogicAnalysisResult(
             contradictions=[],
             total_contradictions_found=0,
@@ -388,24 +625,135 @@ async def analyze_document_deep(
         file.filename,
         result.total_events_found,
         result.total_contradictions_found,
-        result.risk_level,
+        result.risk_level.value,
     )
 
-    return result
+    return _model_response(result)
+
+
+@app.post(
+    "/analyze/deep/stream",
+    summary="Deep analysis with contradictions streamed as they are found",
+    description=(
+        "Same input and pipeline as `POST /analyze/deep`, answered as Server-Sent "
+        "Events: a `timeline` event with the TimelineResponse once extraction is done, "
+        "one `contradiction` event per Contradiction as soon as the model has written "
+        "it, then a final `done` event carrying the complete AnalysisResult, or an "
+        "`error` event if the analysis fails mid-stream. Very long timelines are "
+        "analyzed in windows and only their merged contradictions are sent."
+    ),
+    tags=["Analysis"],
+    responses={
+        200: {"description": "Analysis event stream.", "content": {"text/event-stream": {}}},
+        400: {"description": "Invalid file type or empty file."},
+        413: {"description": "File exceeds 50 MB limit."},
+        422: {"description": "PDF parsing or LLM validation error."},
+        500: {"description": "Internal / OpenAI API error."},
+    },
+)
+async def analyze_document_deep_stream(
+    file: UploadFile = File(..., description="A PDF legal document. Max 50 MB."),
+    max_pages: Optional[int] = Query(
+        None, ge=1, description="Only analyze the first N pages. Default: all pages."
+    ),
+) -> StreamingResponse:
+    file_bytes = await _validate_and_read_pdf(file)
+    logger.info(
+        "'/analyze/deep/stream' received '%s' (%.2f MB).", file.filename, len(file_bytes) / 1e6
+    )
+
+    # Extraction errors still get a plain HTTP error: nothing has been sent yet.
+    timeline = await _deep_timeline(file_bytes, file.filename or "unknown", max_pages)
+
+    logic_key = _logic_cache_key(timeline)
+    cached = _logic_cache.get(logic_key)
+    if cached is not None:
+        logger.info("'/analyze/deep/stream': contradiction cache hit.")
+        items: AsyncIterator[Union[Contradiction, LogicAnalysisResult]] = _replay_logic(cached)
+    else:
+        items = detect_contradictions_stream(timeline=timeline)
+
+    return StreamingResponse(
+        _deep_sse_events(timeline, items, logic_key=logic_key),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _deep_timeline(
+    file_bytes: bytes,
+    filename: str,
+    max_pages: Optional[int],
+) -> TimelineResponse:
+    """
+    Steps 1-2 of the deep analysis routes: the cached timeline of the upload,
+    or a fresh extraction (cached on success). Failures become HTTP errors.
+    """
+    timeline_key = _timeline_cache_key(file_bytes, max_pages)
+    timeline = _timeline_cache.get(timeline_key)
+    if timeline is not None:
+        logger.info("Steps 1-2/3: timeline cache hit for '%s'.", filename)
+        return timeline
+
+    prompt_text = await _parse_pdf_to_prompt(file_bytes, filename, max_pages, cache_key=timeline_key)
+    try:
+        logger.info("Step 2/3: Running timeline extraction…")
+        timeline = await extract_timeline(document_text=prompt_text)
+        logger.info(
+            "Step 2/3 complete: %d events extracted.",
+            timeline.total_events_found,
+        )
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_422_UNPROCESSABLE_ENTITY, detail=str(exc)) from exc
+    except Exception as exc:
+        logger.error("LLM error during timeline extraction in /analyze/deep: %s", exc, exc_info=True)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail="AI service error during timeline extraction. Please retry.",
+        ) from exc
+    _timeline_cache.set(timeline_key, timeline)
+    return timeline
+
+
+async def _replay_logic(
+    logic: LogicAnalysisResult,
+) -> AsyncIterator[Union[Contradiction, LogicAnalysisResult]]:
+    """Yields a cached analysis in the shape `detect_contradictions_stream` produces."""
+    for contradiction in logic.contradictions:
+        yield contradiction
+    yield logic
+
+
+async def _deep_sse_events(
+    timeline: TimelineResponse,
+    items: AsyncIterator[Union[Contradiction, LogicAnalysisResult]],
+    *,
+    logic_key: str,
+) -> AsyncIterator[bytes]:
+    yield _sse("timeline", timeline.model_dump_json().encode())
+    try:
+        async for item in items:
+            if isinstance(item, LogicAnalysisResult):
+                _logic_cache.set(logic_key, item)
+                result = AnalysisResult.from_phases(timeline=timeline, logic=item)
+                yield _sse("done", result.model_dump_json().encode())
+            else:
+                yield _sse("contradiction", item.model_dump_json().encode())
+    except ValueError as exc:
+        yield _sse("error", orjson.dumps({"detail": str(exc)}))
+    except Exception as exc:  # noqa: BLE001
+        logger.error("Unexpected LLM error in /analyze/deep/stream: %s", exc, exc_info=True)
+        yield _sse("error", orjson.dumps({"detail": "AI service error. Please retry."}))
 
 
 # ---------------------------------------------------------------------------
 # Static files — serve the built frontend (dist/) if it exists
 # ---------------------------------------------------------------------------
 
-_dist = Path(__file__).parent / "dist"
-if _dist.exists():
-    app.mount("/assets", StaticFiles(directory=_dist / "assets"), name="assets")
-
-    @app.get("/{full_path:path}", include_in_schema=False)
-    async def serve_spa(full_path: str):
-        """Catch-all: return index.html for any non-API path (SPA routing)."""
-        index = _dist / "index.html"
-        return FileResponse(index)
+# Mounted last so every API route above takes precedence. StaticFiles answers
+# conditional requests (ETag / Last-Modified → 304) and serves index.html for
+# directory paths; the app has no client-side routes that need a catch-all.
+if _SPA_BUILT:
+    app.mount("/", StaticFiles(directory=_dist, html=True), name="spa")
 
 
@@ -4,9 +4,12 @@ Defines the structured output schemas for the LLM extractor, logic analyzer,
 and all API responses.
 """
 
+import logging
 from enum import Enum
-from pydantic import BaseModel, Field, field_validator
-from typing import List, Optional
+from pydantic import BaseModel, Field, ValidationInfo, field_validator, model_validator
+from typing import Any, List, Optional
+
+logger = logging.getLogger(__name__)
 
 
 # =============================================================================
@@ -144,6 +147,26 @@ class ContradictionType(str, Enum):
     """
 
 
+class Severity(str, Enum):
+    """
+    Potential impact of a single contradiction on the case outcome.
+    Validated by Pydantic's native enum coercion (no per-call set literal).
+    """
+    HIGH = "HIGH"
+    MEDIUM = "MEDIUM"
+    LOW = "LOW"
+
+
+class RiskLevel(str, Enum):
+    """
+    Overall case risk, derived from the most severe contradiction found.
+    """
+    HIGH = "HIGH"
+    MEDIUM = "MEDIUM"
+    LOW = "LOW"
+    NONE = "NONE"
+
+
 class Contradiction(BaseModel):
     """
     Represents a single detected logical inconsistency, conflict, or gap
@@ -179,7 +202,7 @@ class Contradiction(BaseModel):
         ),
         min_length=1,
     )
-    severity: str = Field(
+    severity: Severity = Field(
         ...,
         description=(
             "The potential impact of this contradiction on the case outcome. "
@@ -219,22 +242,62 @@ class Contradiction(BaseModel):
         ),
     )
 
-    @field_validator("severity")
+    @model_validator(mode="before")
+    @classmethod
+    def default_event_ids(cls, data: Any, info: ValidationInfo) -> Any:
+        # LLM output (a `total_events` context) that omits the ids falls back
+        # to [0] instead of failing the whole analysis.
+        if (
+            (info.context or {}).get("total_events") is not None
+            and isinstance(data, dict)
+            and data.get("involved_event_ids") is None
+        ):
+            return {**data, "involved_event_ids": [0]}
+        return data
+
+    @field_validator("involved_event_ids", mode="before")
     @classmethod
-    def validate_severity(cls, v: str) -> str:
-        allowed = {"HIGH", "MEDIUM", "LOW"}
-        if v not in allowed:
-            raise ValueError(f"severity must be one of {allowed}, got '{v}'")
-        return v
+    def clamp_to_timeline(cls, v: Any, info: ValidationInfo) -> Any:
+        # With a `total_events` validation context (the logic analyzer's LLM
+        # output), ids outside the timeline are dropped instead of rejected so
+        # the frontend never indexes past the events array. Int-like values
+        # ("3", 3.0) are coerced first, as lax validation would.
+        total_events = (info.context or {}).get("total_events")
+        if total_events is None or not isinstance(v, list):
+            return v
+        ids = (_as_event_id(i) for i in v)
+        valid = [i for i in ids if i is not None and 0 <= i < total_events]
+        if len(valid) != len(v):
+            logger.warning(
+                "Clamped invalid event IDs %s → %s (total_events=%d)", v, valid, total_events
+            )
+        return valid or [0]
 
     @field_validator("involved_event_ids")
     @classmethod
     def validate_event_ids(cls, v: List[int]) -> List[int]:
-        if any(i < 0 for i in v):
+        # min() and sorted(set()) both run in C; min_length=1 guarantees v is non-empty.
+        if min(v) < 0:
             raise ValueError("All involved_event_ids must be >= 0 (0-based index).")
         return sorted(set(v))  # Deduplicate and sort for deterministic output.
 
 
+def _as_event_id(value: Any) -> Optional[int]:
+    """Returns `value` as an int if it is an integer or an int-like str/float."""
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else None
+    if isinstance(value, str):
+        try:
+            return int(value.strip())
+        except ValueError:
+            return None
+    return None
+
+
 class LogicAnalysisResult(BaseModel):
     """
     The raw structured output returned by the logic analyzer LLM call.
@@ -253,7 +316,7 @@ class LogicAnalysisResult(BaseModel):
         ge=0,
         description="Must equal len(contradictions). Will be auto-corrected if wrong.",
     )
-    risk_level: str = Field(
+    risk_level: RiskLevel = Field(
         ...,
         description=(
             "The overall case risk level based on the aggregate severity of all "
@@ -274,14 +337,6 @@ class LogicAnalysisResult(BaseModel):
         ),
     )
 
-    @field_validator("risk_level")
-    @classmethod
-    def validate_risk_level(cls, v: str) -> str:
-        allowed = {"HIGH", "MEDIUM", "LOW", "NONE"}
-        if v not in allowed:
-            raise ValueError(f"risk_level must be one of {allowed}, got '{v}'")
-        return v
-
 
 # =============================================================================
 # Phase 3: Combined Final Response Model
@@ -317,8 +372,8 @@ class AnalysisResult(BaseModel):
         ge=0,
         description="Count of items in the contradictions list.",
     )
-    risk_level: str = Field(
-        default="NONE",
+    risk_level: RiskLevel = Field(
+        default=RiskLevel.NONE,
         description="Overall case risk: 'HIGH', 'MEDIUM', 'LOW', or 'NONE'.",
     )
     analysis_notes: Optional[str] = Field(
@@ -338,8 +393,12 @@ class AnalysisResult(BaseModel):
 
         Separating the merge logic here keeps main.py clean and makes
         unit testing of the merge step trivial.
+
+        Both inputs are already-validated models, so this uses
+        `model_construct`: a shallow merge that shares the event and
+        contradiction objects instead of re-validating every one of them.
         """
-        return cls(
+        return cls.model_construct(
             # Timeline fields
             events=timeline.events,
             document_summary=timeline.document_summary,
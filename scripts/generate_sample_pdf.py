@@ -1,5 +1,8 @@
 from __future__ import annotations
 
+import functools
+import os
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 
 import fitz  # PyMuPDF
@@ -7,6 +10,12 @@ import fitz  # PyMuPDF
 
 OUTPUT = Path("docs/samples/lex-sample-case.pdf")
 
+# Pages are rendered as independent one-page PDFs, so they can be spread over
+# worker processes; below this many pages process start-up costs more than it
+# saves and they are rendered in-process.
+PARALLEL_MIN_PAGES = 8
+MAX_WORKERS = min(os.cpu_count() or 1, 4)
+
 PAGES = [
     {
         "title": "LexTimeline Demo Dosyası",
@@ -57,6 +66,7 @@ PAGES = [
 ]
 
 
+@functools.cache
 def _pick_fontfile() -> str | None:
     candidates = [
         Path("C:/Windows/Fonts/arial.ttf"),
@@ -68,68 +78,69 @@ def _pick_fontfile() -> str | None:
     return None
 
 
+@functools.cache
+def _load_font(fontfile: str | None) -> fitz.Font:
+    """The page font, loaded once per process (fitz.Font cannot be pickled)."""
+    return fitz.Font(fontfile=fontfile) if fontfile else fitz.Font("helv")
+
+
+def _render_page(i: int, page_data: dict[str, str], fontfile: str | None) -> bytes:
+    """Renders page `i` (1-based) as a standalone one-page PDF."""
+    doc = fitz.open()
+    page = doc.new_page(width=595, height=842)  # A4
+    rect = page.rect
+    margin = 56
+
+    # One TextWriter per colour collects the page's runs in Python; each is
+    # then written to the content stream in a single call.
+    font = _load_font(fontfile)
+    heading = fitz.TextWriter(rect, color=(0.12, 0.23, 0.37))
+    muted = fitz.TextWriter(rect, color=(0.41, 0.50, 0.58))
+    body = fitz.TextWriter(rect, color=(0.12, 0.12, 0.13))
+
+    heading.append(fitz.Point(margin, 80), page_data["title"], font=font, fontsize=24)
+    muted.append(fitz.Point(margin, 112), page_data["subtitle"], font=font, fontsize=13)
+    body.fill_textbox(
+        fitz.Rect(margin, 145, rect.width - margin, rect.height - 120),
+        page_data["body"],
+        font=font,
+        fontsize=12.5,
+        lineheight=1.45,
+    )
+    muted.append(
+        fitz.Point(margin, rect.height - 48),
+        f"LexTimeline Demo PDF - Sayfa {i}",
+        font=font,
+        fontsize=9.5,
+    )
+
+    for writer in (heading, muted, body):
+        writer.write_text(page)
+
+    pdf_bytes = doc.tobytes()
+    doc.close()
+    return pdf_bytes
+
+
 def build_pdf() -> None:
     OUTPUT.parent.mkdir(parents=True, exist_ok=True)
     fontfile = _pick_fontfile()
+    numbers = range(1, len(PAGES) + 1)
+    fontfiles = [fontfile] * len(PAGES)
+
+    if len(PAGES) >= PARALLEL_MIN_PAGES:
+        with ProcessPoolExecutor(max_workers=MAX_WORKERS) as pool:
+            rendered = list(pool.map(_render_page, numbers, PAGES, fontfiles))
+    else:
+        rendered = list(map(_render_page, numbers, PAGES, fontfiles))
+
     doc = fitz.open()
+    for pdf_bytes in rendered:
+        with fitz.open("pdf", pdf_bytes) as page_doc:
+            doc.insert_pdf(page_doc)
 
-    for i, page_data in enumerate(PAGES, start=1):
-        page = doc.new_page(width=595, height=842)  # A4
-        rect = page.rect
-        margin = 56
-
-        if fontfile:
-            page.insert_text(
-                fitz.Point(margin, 80),
-                page_data["title"],
-                fontsize=24,
-                fontname="custom",
-                fontfile=fontfile,
-                color=(0.12, 0.23, 0.37),
-            )
-            page.insert_text(
-                fitz.Point(margin, 112),
-                page_data["subtitle"],
-                fontsize=13,
-                fontname="custom",
-                fontfile=fontfile,
-                color=(0.41, 0.50, 0.58),
-            )
-            page.insert_textbox(
-                fitz.Rect(margin, 145, rect.width - margin, rect.height - 120),
-                page_data["body"],
-                fontsize=12.5,
-                fontname="custom",
-                fontfile=fontfile,
-                color=(0.12, 0.12, 0.13),
-                lineheight=1.45,
-            )
-            page.insert_text(
-                fitz.Point(margin, rect.height - 48),
-                f"LexTimeline Demo PDF - Sayfa {i}",
-                fontsize=9.5,
-                fontname="custom",
-                fontfile=fontfile,
-                color=(0.41, 0.50, 0.58),
-            )
-        else:
-            page.insert_text(fitz.Point(margin, 80), page_data["title"], fontsize=24, color=(0.12, 0.23, 0.37))
-            page.insert_text(fitz.Point(margin, 112), page_data["subtitle"], fontsize=13, color=(0.41, 0.50, 0.58))
-            page.insert_textbox(
-                fitz.Rect(margin, 145, rect.width - margin, rect.height - 120),
-                page_data["body"],
-                fontsize=12.5,
-                color=(0.12, 0.12, 0.13),
-                lineheight=1.45,
-            )
-            page.insert_text(
-                fitz.Point(margin, rect.height - 48),
-                f"LexTimeline Demo PDF - Sayfa {i}",
-                fontsize=9.5,
-                color=(0.41, 0.50, 0.58),
-            )
-
-    doc.save(str(OUTPUT))
+    # Each page embedded its own copy of the font; garbage=4 merges duplicates.
+    doc.save(str(OUTPUT), garbage=4, deflate=True)
     doc.close()
     print(f"Created: {OUTPUT}")
 
@@ -0,0 +1,97 @@
+﻿"""
+LexTimeline - In-process Caches
+A small LRU cache whose entries also expire, shared by the API layer and the
+chat service. Everything in it lives in process memory: a restart starts cold.
+
+LLM results can additionally be kept on disk, as one JSON file per key under
+LEXTIMELINE_CACHE_DIR (off when unset), so they survive restarts.
+"""
+
+import logging
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+logger = logging.getLogger(__name__)
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class TTLCache:
+    """
+    Minimal LRU cache whose entries also expire after `ttl` seconds.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[str, tuple[float, Any]]" = OrderedDict()
+
+    def get(self, key: str) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._data[key] = (time.monotonic() + self.ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+def disk_cache_path(key: str) -> Optional[Path]:
+    """The cache file for `key`, or None when the disk cache is off."""
+    cache_dir = os.getenv("LEXTIMELINE_CACHE_DIR")
+    if not cache_dir:
+        return None
+    return Path(cache_dir).expanduser() / f"{key}.json"
+
+
+def read_disk_cache(path: Path, model: type[ModelT]) -> Optional[ModelT]:
+    """Loads a cached `model`; a missing or unreadable entry is a miss."""
+    try:
+        return model.model_validate_json(path.read_bytes())
+    except FileNotFoundError:
+        return None
+    except (OSError, ValidationError) as exc:
+        logger.warning("Ignoring unreadable cache entry %s: %s", path, exc)
+        return None
+
+
+def write_disk_cache(path: Path, value: BaseModel) -> None:
+    """
+    Stores `value` atomically; failures only cost the cache entry.
+
+    Each write goes through its own temp file, so concurrent writers of one
+    key never interleave: the last `os.replace` wins with a complete file.
+    """
+    tmp_path: Optional[Path] = None
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "wb", dir=path.parent, prefix=f"{path.stem}.", suffix=".tmp", delete=False
+        ) as tmp:
+            tmp_path = Path(tmp.name)
+            tmp.write(value.model_dump_json().encode("utf-8"))
+        os.replace(tmp_path, path)
+    except OSError as exc:
+        logger.warning("Could not write cache entry %s: %s", path, exc)
+        if tmp_path is not None:
+            tmp_path.unlink(missing_ok=True)
@@ -0,0 +1,81 @@
+﻿"""
+LexTimeline - Streamed JSON Scanning
+Lets the streaming extractor and analyzer hand each array item (a timeline
+event, a contradiction) to Pydantic as soon as the model has finished it,
+without waiting for the complete structured-output document.
+"""
+
+
+class ArrayItemScanner:
+    """
+    Incremental scanner over a streamed JSON object.
+
+    `feed()` takes the next text delta and returns the raw JSON of every
+    object in the top-level array under `key` completed by it. Only string,
+    escape and nesting state is tracked; full parsing is left to Pydantic.
+    """
+
+    def __init__(self, key: str) -> None:
+        self.key = key
+        # Deltas are kept as a list and only joined when `text` is read, so
+        # feeding a long stream stays linear instead of re-copying it per delta.
+        self._parts: list[str] = []
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._last_key = ""
+        self._in_array = False
+        # Pieces of the depth-1 string / array item still open at the end of
+        # the previous delta; None when none is open.
+        self._key_parts: list[str] | None = None
+        self._item_parts: list[str] | None = None
+
+    @property
+    def text(self) -> str:
+        """Everything fed so far."""
+        if len(self._parts) > 1:
+            self._parts[:] = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    def feed(self, delta: str) -> list[str]:
+        self._parts.append(delta)
+        completed: list[str] = []
+        # Where the open key / item starts in this delta (0 if an earlier one).
+        key_start = item_start = 0
+        for i, char in enumerate(delta):
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == "\\":
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if self._key_parts is not None:
+                        self._key_parts.append(delta[key_start:i])
+                        self._last_key = "".join(self._key_parts)
+                        self._key_parts = None
+            elif char == '"':
+                self._in_string = True
+                if self._depth == 1:
+                    self._key_parts = []
+                    key_start = i + 1
+            elif char in "{[":
+                if self._in_array and self._depth == 2 and char == "{":
+                    self._item_parts = []
+                    item_start = i
+                elif self._depth == 1 and char == "[" and self._last_key == self.key:
+                    self._in_array = True
+                self._depth += 1
+            elif char in "}]":
+                self._depth -= 1
+                if self._in_array and self._depth == 2 and char == "}":
+                    self._item_parts.append(delta[item_start:i + 1])
+                    completed.append("".join(self._item_parts))
+                    self._item_parts = None
+                elif self._in_array and self._depth == 1:
+                    self._in_array = False
+        if self._key_parts is not None:
+            self._key_parts.append(delta[key_start:])
+        if self._item_parts is not None:
+            self._item_parts.append(delta[item_start:])
+        return completed
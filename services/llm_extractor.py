@@ -4,15 +4,29 @@ Sends extracted PDF text to OpenAI and returns a strictly validated
 TimelineResponse using OpenAI's Structured Outputs feature (JSON Schema mode).
 """
 
-import json
+import asyncio
+import hashlib
 import logging
-import os
-from typing import Any, Optional
+import re
+from collections.abc import AsyncIterator
+from typing import Any, Optional, Union
 
-from openai import AsyncAzureOpenAI, OpenAIError
+import orjson
+from openai import OpenAIError
 from openai.types.chat import ChatCompletionMessageParam
-
-from models import TimelineResponse  # noqa: E402
+from pydantic import ValidationError
+
+from models import TimelineEvent, TimelineResponse  # noqa: E402
+from services.cache import TTLCache, disk_cache_path, read_disk_cache, write_disk_cache
+from services.json_stream import ArrayItemScanner
+from services.openai_client import (
+    cached_prompt_tokens,
+    get_azure_config,
+    get_openai_client,
+    mark_json_schema_unsupported,
+    should_fallback_to_json_object,
+    supports_json_schema,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -20,11 +34,42 @@ logger = logging.getLogger(__name__)
 # Constants
 # ---------------------------------------------------------------------------
 
-DEFAULT_MODEL = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4.1")
 DEFAULT_TEMPERATURE = 0.0  # Deterministic output — critical for legal accuracy.
-MAX_RETRIES = 2            # OpenAI client-level retries for transient errors.
 TIMELINE_SCHEMA_NAME = "timeline_response"
 
+# Documents longer than this are split on page boundaries into chunks of about
+# CHUNK_TARGET_CHARS, extracted in parallel (at most MAX_PARALLEL_CHUNKS calls
+# at once to respect the Azure rate limit) and merged.
+CHUNKED_EXTRACTION_MIN_CHARS = 60_000
+CHUNK_TARGET_CHARS = 30_000
+MAX_PARALLEL_CHUNKS = 4
+_PAGE_TAG_RE = re.compile(r"(?m)^(?=\[SAYFA \d+\])")
+
+# A document with nothing that looks like a date (numeric day/month/year or a
+# 19xx/20xx year) has no events to extract, so it is answered locally instead
+# of with a full LLM round-trip.
+_DATE_HINT_RE = re.compile(
+    r"\b(?:\d{1,2}[./-]\d{1,2}[./-]\d{2,4}|\d{4}-\d{1,2}-\d{1,2}|(?:19|20)\d{2})\b"
+)
+NO_DATES_SUMMARY = "Belgede tarih içeren bir ifade bulunamadı; zaman çizelgesi çıkarılmadı."
+
+# Azure Batch API (`extract_timelines_batch`): half the price of online calls
+# for bulk/offline ingestion, in exchange for results within the window.
+BATCH_COMPLETION_WINDOW = "24h"
+BATCH_POLL_INTERVAL_SECONDS = 60.0
+_BATCH_ENDPOINT = "/chat/completions"
+_BATCH_TERMINAL_STATUSES = {"completed", "failed", "expired", "cancelled"}
+
+# Extractions currently awaiting OpenAI, keyed by (document hash, model,
+# temperature). Identical concurrent uploads share a single LLM call.
+_inflight: dict[tuple[str, str, float], "asyncio.Future[TimelineResponse]"] = {}
+
+# Completed extractions, keyed like the on-disk cache (see `_result_cache_key`),
+# so the same text re-submitted through any entry point skips the LLM.
+RESULT_CACHE_SIZE = 256
+RESULT_CACHE_TTL_SECONDS = 7 * 24 * 60 * 60  # 7 days
+_result_cache = TTLCache(RESULT_CACHE_SIZE, RESULT_CACHE_TTL_SECONDS)
+
 # ---------------------------------------------------------------------------
 # System Prompt
 # ---------------------------------------------------------------------------
@@ -101,36 +146,30 @@ YANITINI YALNIZCA aşağıdaki JSON formatında ver, başka hiçbir metin ekleme
 }
 """.strip()
 
+# Built once and shared by every call: Azure caches a repeated prompt prefix
+# server-side (from 1024 tokens), so the system message must stay first and
+# byte-identical. Never format per-request data into SYSTEM_PROMPT.
+_SYSTEM_MESSAGE: ChatCompletionMessageParam = {"role": "system", "content": SYSTEM_PROMPT}
 
-# ---------------------------------------------------------------------------
-# Client factory
-# ---------------------------------------------------------------------------
+# Part of the result cache key, so editing the prompt invalidates old results.
+_PROMPT_DIGEST = hashlib.sha256(SYSTEM_PROMPT.encode("utf-8")).hexdigest()
 
-def _get_openai_client() -> AsyncAzureOpenAI:
-    """
-    Creates and returns an AsyncAzureOpenAI client.
-    Reads credentials from AZURE_OPENAI_* environment variables.
+# Routes extraction calls to the Azure prompt cache holding SYSTEM_PROMPT when
+# AZURE_OPENAI_PROMPT_CACHE_KEY is enabled; changes with the prompt.
+_PROMPT_CACHE_KEY = f"lextimeline-timeline-{_PROMPT_DIGEST[:12]}"
 
-    Returns:
-        Configured AsyncAzureOpenAI client instance.
+_USER_HEADER = (
+    "Aşağıdaki hukuki belge metnini analiz et ve tüm tarihli olayları "
+    "çıkararak yapılandırılmış zaman çizelgesini oluştur:\n\n"
+    "---\n"
+)
 
-    Raises:
-        ValueError: If required Azure environment variables are not set.
-    """
-    api_key  = os.getenv("AZURE_OPENAI_API_KEY")
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    version  = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-    if not api_key or not endpoint:
-        raise ValueError(
-            "AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT environment variables "
-            "must be set. Please add them to your .env file."
-        )
-    return AsyncAzureOpenAI(
-        api_key=api_key,
-        azure_endpoint=endpoint,
-        api_version=version,
-        max_retries=MAX_RETRIES,
-    )
+# Used only when a long document was extracted in chunks.
+SUMMARY_MERGE_PROMPT = (
+    "Aşağıda aynı hukuki belgenin ardışık bölümlerine ait özetler var. Bunları, "
+    "hızlı bir yönelim arayan kıdemli bir avukat için 2-3 cümlelik tek bir "
+    "yönetici özetinde birleştir. Yalnızca özeti yaz."
+)
 
 
 # ---------------------------------------------------------------------------
@@ -151,7 +190,7 @@ async def extract_timeline(
 
     Args:
         document_text: The concatenated, page-tagged text from the PDF.
-        model:         OpenAI model name. Defaults to OPENAI_MODEL env var or "gpt-4.1".
+        model:         OpenAI model name. Defaults to AZURE_OPENAI_DEPLOYMENT_NAME or "gpt-4.1".
         temperature:   Sampling temperature. Keep at 0.0 for legal precision.
 
     Returns:
@@ -161,52 +200,244 @@ async def extract_timeline(
         ValueError:   If the OpenAI response is empty or unparseable.
         OpenAIError:  If the OpenAI API call itself fails (network, auth, quota).
     """
-    resolved_model = model or DEFAULT_MODEL
-    client = _get_openai_client()
+    resolved_model = model or get_azure_config().deployment
+    digest = hashlib.sha256(document_text.encode("utf-8")).hexdigest()
+    flight_key = (digest, resolved_model, temperature)
+
+    task = _inflight.get(flight_key)
+    if task is None:
+        task = asyncio.ensure_future(
+            _request_timeline_cached(document_text, resolved_model, temperature, digest)
+        )
+        _inflight[flight_key] = task
+        task.add_done_callback(lambda _t: _inflight.pop(flight_key, None))
+    else:
+        logger.info("Joining an in-flight extraction for the same document.")
 
-    messages: list[ChatCompletionMessageParam] = [
-        {"role": "system", "content": SYSTEM_PROMPT},
-        {
-            "role": "user",
-            "content": (
-                "Aşağıdaki hukuki belge metnini analiz et ve tüm tarihli olayları "
-                "çıkararak yapılandırılmış zaman çizelgesini oluştur:\n\n"
-                "---\n"
-                f"{document_text}\n"
-                "---"
-            ),
-        },
+    # Shield so one client disconnecting does not cancel the call for the rest.
+    return await asyncio.shield(task)
+
+
+async def extract_timelines(
+    documents: list[str],
+    model: Optional[str] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    max_concurrency: Optional[int] = None,
+) -> list[Union[TimelineResponse, BaseException]]:
+    """
+    Extracts the timelines of several documents concurrently.
+
+    At most `max_concurrency` documents are in flight at once (tune it against
+    the deployment's RPM/TPM quota); all of them share the client's connection
+    pool. Results come back in input order. A failed document does not abort
+    the batch: its slot holds the exception instead of a TimelineResponse.
+
+    Args:
+        documents:       Page-tagged document texts, as for `extract_timeline`.
+        model:           OpenAI model name. Defaults to the configured deployment.
+        temperature:     Sampling temperature.
+        max_concurrency: Upper bound on concurrent extractions (at least 1).
+                         Defaults to the configured LLM_CONCURRENCY.
+
+    Returns:
+        One TimelineResponse or exception per input document, in order.
+    """
+    if max_concurrency is None:
+        max_concurrency = get_azure_config().llm_concurrency
+    # Semaphore(0) would never let a document through.
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+    async def extract_bounded(document_text: str) -> TimelineResponse:
+        async with semaphore:
+            return await extract_timeline(document_text, model=model, temperature=temperature)
+
+    return await asyncio.gather(
+        *(extract_bounded(text) for text in documents),
+        return_exceptions=True,
+    )
+
+
+async def extract_timelines_batch(
+    documents: list[str],
+    model: Optional[str] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+    poll_interval: float = BATCH_POLL_INTERVAL_SECONDS,
+) -> list[Union[TimelineResponse, BaseException]]:
+    """
+    Extracts the timelines of many documents through the Azure Batch API.
+
+    For bulk/offline ingestion (e.g. backfilling a corpus): all requests go
+    into one JSONL file, are run as a single batch job and polled until it
+    finishes, at half the cost of online calls. `model` must name a batch
+    (GlobalBatch) deployment. Documents are sent whole, without the page
+    chunking `extract_timeline` applies to very long ones.
+
+    Returns:
+        One TimelineResponse or exception per input document, in order, like
+        `extract_timelines`.
+
+    Raises:
+        ValueError:   If the batch job ends without completing.
+        OpenAIError:  If uploading the file or managing the batch fails.
+    """
+    resolved_model = model or get_azure_config().deployment
+    response_format = (
+        _STRUCTURED_RESPONSE_FORMAT
+        if supports_json_schema(resolved_model)
+        else _JSON_OBJECT_RESPONSE_FORMAT
+    )
+    results: list[Union[TimelineResponse, BaseException, None]] = [None] * len(documents)
+
+    lines: list[bytes] = []
+    for index, document_text in enumerate(documents):
+        if not _DATE_HINT_RE.search(document_text):
+            results[index] = _empty_timeline(document_text)
+            continue
+        lines.append(orjson.dumps({
+            "custom_id": str(index),
+            "method": "POST",
+            "url": _BATCH_ENDPOINT,
+            "body": {
+                "model": resolved_model,
+                "messages": _build_messages(document_text),
+                "temperature": temperature,
+                "response_format": response_format,
+            },
+        }))
+
+    if lines:
+        client = get_openai_client()
+        input_file = await client.files.create(
+            file=("timelines.jsonl", b"\n".join(lines)),
+            purpose="batch",
+        )
+        batch = await client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=_BATCH_ENDPOINT,
+            completion_window=BATCH_COMPLETION_WINDOW,
+        )
+        logger.info("Submitted batch %s with %d documents.", batch.id, len(lines))
+
+        while batch.status not in _BATCH_TERMINAL_STATUSES:
+            await asyncio.sleep(poll_interval)
+            batch = await client.batches.retrieve(batch.id)
+
+        if batch.status != "completed":
+            raise ValueError(f"Batch {batch.id} ended with status '{batch.status}'.")
+
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if file_id:
+                content = await client.files.content(file_id)
+                for line in content.read().splitlines():
+                    if line.strip():
+                        index, result = _parse_batch_line(line)
+                        results[index] = result
+
+    return [
+        ValueError("The batch returned no result for this document.") if result is None else result
+        for result in results
     ]
 
+
+async def _request_timeline_cached(
+    document_text: str,
+    resolved_model: str,
+    temperature: float,
+    digest: str,
+) -> TimelineResponse:
+    """
+    `_request_timeline` behind the result caches: an in-memory TTL cache,
+    then an optional on-disk one.
+
+    The disk cache is enabled by setting LEXTIMELINE_CACHE_DIR; results are
+    stored there as JSON so they survive restarts (re-runs after a deploy,
+    CI, repeated uploads). Both are keyed by document digest, model,
+    temperature and system prompt.
+    """
+    key = _result_cache_key(digest, resolved_model, temperature)
+    cached = _result_cache.get(key)
+    if cached is not None:
+        logger.info("Timeline served from memory cache.")
+        return cached
+
+    path = disk_cache_path(key)
+    if path is not None:
+        cached = read_disk_cache(path, TimelineResponse)
+        if cached is not None:
+            logger.info("Timeline served from disk cache (%s).", path.name)
+            _result_cache.set(key, cached)
+            return cached
+
+    timeline = await _request_timeline(document_text, resolved_model, temperature)
+
+    _result_cache.set(key, timeline)
+    if path is not None:
+        write_disk_cache(path, timeline)
+    return timeline
+
+
+def _result_cache_key(digest: str, resolved_model: str, temperature: float) -> str:
+    """
+    Cache key of one extraction. Includes the system prompt's digest, so any
+    prompt edit invalidates earlier results without a manual version bump.
+    """
+    return hashlib.sha256(
+        f"{digest}|{resolved_model}|{temperature}|{_PROMPT_DIGEST}".encode("utf-8")
+    ).hexdigest()
+
+
+async def _request_timeline(
+    document_text: str,
+    resolved_model: str,
+    temperature: float,
+) -> TimelineResponse:
+    """
+    Performs the actual OpenAI call(s) for `extract_timeline`: one call for
+    normal documents, parallel per-chunk calls merged into one timeline for
+    long ones. Documents without any date skip the API entirely.
+    """
+    if not _DATE_HINT_RE.search(document_text):
+        return _empty_timeline(document_text)
+
+    if len(document_text) <= CHUNKED_EXTRACTION_MIN_CHARS:
+        return await _extract_chunk(document_text, resolved_model, temperature)
+
+    chunks = _split_by_page_tags(document_text, CHUNK_TARGET_CHARS)
+    if len(chunks) == 1:
+        return await _extract_chunk(document_text, resolved_model, temperature)
+
+    logger.info(
+        "Document is %d chars; extracting %d chunks in parallel.",
+        len(document_text),
+        len(chunks),
+    )
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_CHUNKS)
+
+    async def extract_bounded(chunk: str) -> TimelineResponse:
+        async with semaphore:
+            return await _extract_chunk(chunk, resolved_model, temperature)
+
+    parts = await asyncio.gather(*(extract_bounded(chunk) for chunk in chunks))
+    return await _merge_timelines(list(parts), resolved_model)
+
+
+async def _extract_chunk(
+    document_text: str,
+    resolved_model: str,
+    temperature: float,
+) -> TimelineResponse:
+    """
+    Runs a single extraction call over `document_text`.
+    """
     logger.info(
         "Sending document (%d chars) to OpenAI model '%s'.",
         len(document_text),
         resolved_model,
     )
 
-    try:
-        response = await client.chat.completions.create(
-            model=resolved_model,
-            messages=messages,
-            temperature=temperature,
-            response_format=_build_structured_response_format(),
-        )
-    except OpenAIError as exc:
-        if _should_fallback_to_json_object(exc):
-            logger.warning(
-                "Structured output unsupported for this deployment/API version. "
-                "Falling back to json_object mode. Error: %s",
-                exc,
-            )
-            response = await client.chat.completions.create(
-                model=resolved_model,
-                messages=messages,
-                temperature=temperature,
-                response_format={"type": "json_object"},
-            )
-        else:
-            logger.error("Azure OpenAI API call failed: %s", exc)
-            raise
+    response = await _create_completion(
+        _build_messages(document_text), resolved_model, temperature
+    )
 
     raw_content = response.choices[0].message.content
 
@@ -216,15 +447,242 @@ async def extract_timeline(
             "The document may be too short or contain no extractable legal events."
         )
 
+    # The usage arguments are computed eagerly; skip them when INFO is off.
+    if logger.isEnabledFor(logging.INFO):
+        usage = response.usage
+        logger.info(
+            "Received response from OpenAI. Finish reason: '%s'. "
+            "Prompt tokens: %d (cached: %d), Completion tokens: %d.",
+            response.choices[0].finish_reason,
+            usage.prompt_tokens if usage else -1,
+            cached_prompt_tokens(usage),
+            usage.completion_tokens if usage else -1,
+        )
+
+    return _parse_and_validate(raw_content)
+
+
+def _parse_batch_line(line: bytes) -> tuple[int, Union[TimelineResponse, BaseException]]:
+    """
+    Maps one line of a batch output/error file to (document index, result).
+    """
+    record = orjson.loads(line)
+    index = int(record["custom_id"])
+    response = record.get("response") or {}
+    if record.get("error") or response.get("status_code") != 200:
+        error = record.get("error") or response.get("body", {}).get("error")
+        return index, ValueError(f"Batch request failed: {error}")
+
+    raw_content = response["body"]["choices"][0]["message"]["content"]
+    if not raw_content:
+        return index, ValueError("OpenAI returned an empty response.")
+    try:
+        return index, _parse_and_validate(raw_content)
+    except ValueError as exc:
+        return index, exc
+
+
+def _empty_timeline(document_text: str) -> TimelineResponse:
+    """The timeline of a document with no dates, built without calling OpenAI."""
+    logger.warning(
+        "No date-like text in document (%d chars); skipping the OpenAI call.",
+        len(document_text),
+    )
+    return TimelineResponse(
+        events=[],
+        document_summary=NO_DATES_SUMMARY,
+        total_events_found=0,
+    )
+
+
+def _split_by_page_tags(document_text: str, target_chars: int) -> list[str]:
+    """
+    Splits page-tagged prompt text on its `[SAYFA N]` markers into chunks of
+    whole pages, each about `target_chars` long (a single oversized page
+    becomes its own chunk).
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    current_len = 0
+    for page in _PAGE_TAG_RE.split(document_text):
+        if not page:
+            continue
+        if current and current_len + len(page) > target_chars:
+            chunks.append("".join(current))
+            current, current_len = [], 0
+        current.append(page)
+        current_len += len(page)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+
+async def _merge_timelines(parts: list[TimelineResponse], resolved_model: str) -> TimelineResponse:
+    """
+    Merges per-chunk timelines: concatenates events, drops duplicates seen at
+    chunk boundaries, re-sorts by date and condenses the chunk summaries.
+    """
+    seen: set[tuple[str, str]] = set()
+    events: list[TimelineEvent] = []
+    for part in parts:
+        for event in part.events:
+            key = (event.date, event.description[:64])
+            if key not in seen:
+                seen.add(key)
+                events.append(event)
+    # ISO-style dates sort chronologically as strings; the sort is stable, so
+    # same-date events keep their document order.
+    events.sort(key=lambda event: event.date)
+
+    summary = await _merge_summaries([part.document_summary for part in parts], resolved_model)
+    # Every part is already validated, so assemble without re-validating.
+    return TimelineResponse.model_construct(
+        events=events,
+        document_summary=summary,
+        total_events_found=len(events),
+        primary_jurisdiction=next((p.primary_jurisdiction for p in parts if p.primary_jurisdiction), None),
+        case_number=next((p.case_number for p in parts if p.case_number), None),
+    )
+
+
+async def _merge_summaries(summaries: list[str], resolved_model: str) -> str:
+    """
+    Condenses per-chunk summaries into one executive summary with a short,
+    plain-text call. Falls back to joining them if that call fails.
+    """
+    numbered = "\n".join(f"{i}. {summary}" for i, summary in enumerate(summaries, start=1))
+    try:
+        response = await get_openai_client().chat.completions.create(
+            model=resolved_model,
+            messages=[
+                {"role": "system", "content": SUMMARY_MERGE_PROMPT},
+                {"role": "user", "content": numbered},
+            ],
+            temperature=0.0,
+            max_tokens=300,
+        )
+        content = response.choices[0].message.content
+        if content:
+            return content.strip()
+    except OpenAIError as exc:
+        logger.warning("Summary merge call failed; joining chunk summaries. Error: %s", exc)
+    return " ".join(summaries)
+
+
+async def extract_timeline_stream(
+    document_text: str,
+    model: Optional[str] = None,
+    temperature: float = DEFAULT_TEMPERATURE,
+) -> AsyncIterator[Union[TimelineEvent, TimelineResponse]]:
+    """
+    Streaming variant of `extract_timeline` for progress UIs.
+
+    Yields each `TimelineEvent` as soon as the model has finished writing it,
+    then, as the final item, the complete validated `TimelineResponse`.
+    Not coalesced or cached like `extract_timeline`.
+
+    Raises:
+        ValueError:   If the streamed response is empty or fails validation.
+        OpenAIError:  If the OpenAI API call itself fails.
+    """
+    if not _DATE_HINT_RE.search(document_text):
+        yield _empty_timeline(document_text)
+        return
+
+    resolved_model = model or get_azure_config().deployment
     logger.info(
-        "Received response from OpenAI. Finish reason: '%s'. "
-        "Prompt tokens: %d, Completion tokens: %d.",
-        response.choices[0].finish_reason,
-        response.usage.prompt_tokens if response.usage else -1,
-        response.usage.completion_tokens if response.usage else -1,
+        "Streaming document (%d chars) to OpenAI model '%s'.",
+        len(document_text),
+        resolved_model,
     )
 
-    return _parse_and_validate(raw_content)
+    stream = await _create_completion(
+        _build_messages(document_text), resolved_model, temperature, stream=True
+    )
+    scanner = ArrayItemScanner("events")
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        for event_json in scanner.feed(delta):
+            try:
+                yield TimelineEvent.model_validate_json(event_json)
+            except ValidationError as exc:
+                # The final validation below reports it; keep streaming.
+                logger.warning("Skipping invalid streamed event: %s", exc)
+
+    if not scanner.text:
+        raise ValueError(
+            "OpenAI returned an empty response. "
+            "The document may be too short or contain no extractable legal events."
+        )
+    yield _parse_and_validate(scanner.text)
+
+
+def _build_messages(document_text: str) -> list[ChatCompletionMessageParam]:
+    """
+    Builds the system + user messages for one extraction call.
+    """
+    return [
+        _SYSTEM_MESSAGE,
+        {
+            "role": "user",
+            # Separate text parts, so the (possibly very large) document is
+            # referenced as-is rather than copied into one concatenated string.
+            "content": [
+                {"type": "text", "text": _USER_HEADER},
+                {"type": "text", "text": document_text},
+                {"type": "text", "text": "\n---"},
+            ],
+        },
+    ]
+
+
+async def _create_completion(
+    messages: list[ChatCompletionMessageParam],
+    resolved_model: str,
+    temperature: float,
+    **kwargs: Any,
+) -> Any:
+    """
+    Calls chat.completions.create with strict Structured Outputs, falling back
+    to json_object mode when the deployment/API version does not support it.
+    A deployment that rejected the schema once is sent json_object directly.
+    Extra kwargs (e.g. `stream=True`) are passed through.
+    """
+    client = get_openai_client()
+    if get_azure_config().prompt_cache_key:
+        kwargs.setdefault("extra_body", {"prompt_cache_key": _PROMPT_CACHE_KEY})
+    use_schema = supports_json_schema(resolved_model)
+    try:
+        return await client.chat.completions.create(
+            model=resolved_model,
+            messages=messages,
+            temperature=temperature,
+            response_format=(
+                _STRUCTURED_RESPONSE_FORMAT if use_schema else _JSON_OBJECT_RESPONSE_FORMAT
+            ),
+            **kwargs,
+        )
+    except OpenAIError as exc:
+        if not use_schema or not should_fallback_to_json_object(exc):
+            logger.error("Azure OpenAI API call failed: %s", exc)
+            raise
+        mark_json_schema_unsupported(resolved_model)
+        logger.warning(
+            "Structured output unsupported for this deployment/API version. "
+            "Falling back to json_object mode. Error: %s",
+            exc,
+        )
+        return await client.chat.completions.create(
+            model=resolved_model,
+            messages=messages,
+            temperature=temperature,
+            response_format=_JSON_OBJECT_RESPONSE_FORMAT,
+            **kwargs,
+        )
 
 
 # ---------------------------------------------------------------------------
@@ -346,19 +804,9 @@ def _build_structured_response_format() -> dict[str, Any]:
     }
 
 
-def _should_fallback_to_json_object(exc: OpenAIError) -> bool:
-    """
-    Returns True when the API/deployment rejects `json_schema` response_format.
-    """
-    message = str(exc).lower()
-    markers = (
-        "json_schema",
-        "response_format",
-        "unsupported",
-        "not supported",
-        "invalid parameter",
-    )
-    return any(marker in message for marker in markers)
+# The schema is static: build the payload once instead of on every call.
+_STRUCTURED_RESPONSE_FORMAT = _build_structured_response_format()
+_JSON_OBJECT_RESPONSE_FORMAT = {"type": "json_object"}
 
 
 # ---------------------------------------------------------------------------
@@ -381,17 +829,24 @@ def _parse_and_validate(raw_json: str) -> TimelineResponse:
     Raises:
         ValueError: If JSON is malformed or Pydantic validation fails.
     """
+    # pydantic-core parses and validates in one pass, with no intermediate dict.
+    error: Optional[str] = None
     try:
-        data = json.loads(raw_json)
-    except json.JSONDecodeError as exc:
-        logger.error("Failed to parse OpenAI JSON response: %s\nRaw: %s", exc, raw_json[:500])
-        raise ValueError(f"OpenAI returned malformed JSON: {exc}") from exc
-
-    try:
-        timeline = TimelineResponse(**data)
-    except Exception as exc:  # noqa: BLE001
-        logger.error("Pydantic validation failed for OpenAI response: %s", exc)
-        raise ValueError(f"OpenAI response failed schema validation: {exc}") from exc
+        timeline = TimelineResponse.model_validate_json(raw_json)
+    except ValidationError as exc:
+        # Only types, locations and messages: the input is case-document text.
+        errors = exc.errors(include_url=False, include_input=False)
+        if any(e["type"] == "json_invalid" for e in errors):
+            logger.error("Failed to parse OpenAI JSON response: %s", errors)
+            error = "OpenAI returned malformed JSON."
+        else:
+            logger.error("Pydantic validation failed for OpenAI response: %s", errors)
+            error = f"OpenAI response failed schema validation ({len(errors)} errors)."
+    if error is not None:
+        # Raised outside the except block: the ValidationError keeps the whole
+        # raw response as its input, and chaining it would keep that alive for
+        # as long as the ValueError is (e.g. in an `extract_timelines` batch).
+        raise ValueError(error)
 
     # Sanity-check: ensure total_events_found matches the actual list length.
     actual_count = len(timeline.events)
@@ -10,15 +10,35 @@ Uses OpenAI Structured Outputs to guarantee the response conforms exactly
 to the LogicAnalysisResult schema — no post-processing regex required.
 """
 
-import json
+import asyncio
+import hashlib
 import logging
-import os
-from typing import Any
+from collections.abc import AsyncIterator
+from typing import Any, Optional, Union
 
-from openai import AsyncAzureOpenAI, OpenAIError
+import orjson
+from openai import OpenAIError
 from openai.types.chat import ChatCompletionMessageParam
-
-from models import LogicAnalysisResult, TimelineEvent, TimelineResponse
+from pydantic import ValidationError
+
+from models import (
+    Contradiction,
+    LogicAnalysisResult,
+    RiskLevel,
+    Severity,
+    TimelineEvent,
+    TimelineResponse,
+)
+from services.cache import disk_cache_path, read_disk_cache, write_disk_cache
+from services.json_stream import ArrayItemScanner
+from services.openai_client import (
+    cached_prompt_tokens,
+    get_azure_config,
+    get_openai_client,
+    mark_json_schema_unsupported,
+    should_fallback_to_json_object,
+    supports_json_schema,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -26,16 +46,34 @@ logger = logging.getLogger(__name__)
 # Constants
 # ---------------------------------------------------------------------------
 
-DEFAULT_MODEL = os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4.1")
-
 # Use a non-zero temperature here: we WANT the model to "think creatively"
 # and consider non-obvious connections between events, rather than just
 # pattern-matching the most obvious conflicts.
 ANALYSIS_TEMPERATURE = 0.1
 
-MAX_RETRIES = 2
 LOGIC_SCHEMA_NAME = "logic_analysis_result"
 
+# A contradiction needs at least two events to cross-reference; below this the
+# LLM call is skipped entirely.
+MIN_EVENTS_FOR_ANALYSIS = 2
+
+# Timelines with at least this many events are analyzed as overlapping windows
+# of ANALYSIS_WINDOW_SIZE events (sharing ANALYSIS_WINDOW_OVERLAP events with
+# the previous window), at most MAX_PARALLEL_WINDOWS calls at once, and the
+# findings merged. Conflicts between events that never share a window are not
+# cross-referenced; the overlap keeps neighbouring events together.
+WINDOWED_ANALYSIS_MIN_EVENTS = 40
+ANALYSIS_WINDOW_SIZE = 30
+ANALYSIS_WINDOW_OVERLAP = 5
+MAX_PARALLEL_WINDOWS = 4
+
+# Entities sent per event. Cross-referencing needs the parties and witnesses
+# named first; long tails of incidental names only add prompt tokens.
+MAX_PROMPT_ENTITIES = 6
+
+_SEVERITY_RANK = {Severity.HIGH: 0, Severity.MEDIUM: 1, Severity.LOW: 2}
+_RISK_RANK = {RiskLevel.HIGH: 0, RiskLevel.MEDIUM: 1, RiskLevel.LOW: 2, RiskLevel.NONE: 3}
+
 # ---------------------------------------------------------------------------
 # System Prompt — "The Senior Prosecutor"
 # ---------------------------------------------------------------------------
@@ -138,6 +176,15 @@ YANITINI YALNIZCA aşağıdaki JSON formatında ver, başka hiçbir metin ekleme
 }
 """.strip()
 
+# Built once so every analysis starts with the same system message; Azure's
+# prefix cache can then serve this part of the prompt across requests.
+_SYSTEM_MESSAGE: ChatCompletionMessageParam = {"role": "system", "content": LOGIC_SYSTEM_PROMPT}
+
+# Routes analysis calls to the same prefix-cache shard when
+# AZURE_OPENAI_PROMPT_CACHE_KEY is enabled; changes with the prompt.
+_PROMPT_DIGEST = hashlib.sha256(LOGIC_SYSTEM_PROMPT.encode("utf-8")).hexdigest()
+_PROMPT_CACHE_KEY = f"lextimeline-logic-{_PROMPT_DIGEST[:12]}"
+
 
 # ---------------------------------------------------------------------------
 # Public API
@@ -153,10 +200,14 @@ async def detect_contradictions(
 
     The events are serialized as a numbered JSON array so the LLM can
     reference them by their 0-based array index in `involved_event_ids`.
+    Long timelines are analyzed as overlapping windows in parallel and the
+    findings merged; ids always refer to `timeline.events`. With
+    LEXTIMELINE_CACHE_DIR set, results are also cached on disk, keyed by the
+    events, model and system prompt.
 
     Args:
         timeline: The validated TimelineResponse from the extraction phase.
-        model:    OpenAI model name override. Falls back to OPENAI_MODEL env var.
+        model:    OpenAI model name override. Falls back to AZURE_OPENAI_DEPLOYMENT_NAME.
 
     Returns:
         A validated LogicAnalysisResult Pydantic model.
@@ -165,6 +216,92 @@ async def detect_contradictions(
         ValueError:   If the OpenAI response is empty or fails Pydantic validation.
         OpenAIError:  If the OpenAI API call itself fails.
     """
+    skipped = _skipped_analysis(timeline)
+    if skipped is not None:
+        return skipped
+
+    resolved_model = model or get_azure_config().deployment
+    # Serialized once: the same text keys the disk cache and, unless the
+    # timeline is split into windows, is the event list sent to the model.
+    serialized_events = _serialize_events_for_prompt(timeline.events)
+    path = disk_cache_path(_result_cache_key(serialized_events, resolved_model))
+    if path is not None:
+        cached = read_disk_cache(path, LogicAnalysisResult)
+        if cached is not None:
+            logger.info("Contradiction analysis served from disk cache (%s).", path.name)
+            return cached
+
+    result = await _request_analysis(timeline.events, resolved_model, serialized_events)
+    if path is not None:
+        write_disk_cache(path, result)
+    return result
+
+
+async def detect_contradictions_stream(
+    timeline: TimelineResponse,
+    model: str | None = None,
+) -> AsyncIterator[Union[Contradiction, LogicAnalysisResult]]:
+    """
+    Streaming variant of `detect_contradictions` for progress UIs.
+
+    Yields each `Contradiction` as soon as the model has finished writing it,
+    then, as the final item, the complete validated `LogicAnalysisResult`.
+    Timelines long enough to be analyzed in windows only yield the merged
+    result. Not cached like `detect_contradictions`.
+
+    Raises:
+        ValueError:   If the streamed response is empty or fails validation.
+        OpenAIError:  If the OpenAI API call itself fails.
+    """
+    skipped = _skipped_analysis(timeline)
+    if skipped is not None:
+        yield skipped
+        return
+
+    events = timeline.events
+    resolved_model = model or get_azure_config().deployment
+    if len(events) >= WINDOWED_ANALYSIS_MIN_EVENTS:
+        yield await _request_analysis(events, resolved_model)
+        return
+
+    logger.info(
+        "Streaming contradiction analysis on %d events using model '%s'.",
+        len(events),
+        resolved_model,
+    )
+    stream = await _create_completion(_build_messages(events), resolved_model, stream=True)
+    scanner = ArrayItemScanner("contradictions")
+    context = {"total_events": len(events)}
+    async for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if not delta:
+            continue
+        for item_json in scanner.feed(delta):
+            try:
+                yield Contradiction.model_validate_json(item_json, context=context)
+            except ValidationError as exc:
+                # The final validation below reports it; keep streaming.
+                logger.warning("Skipping invalid streamed contradiction: %s", exc)
+
+    if not scanner.text:
+        raise ValueError(
+            "Logic analyzer received an empty response from OpenAI. "
+            "This may be a transient API issue — please retry."
+        )
+    yield _parse_and_validate(scanner.text, total_events=len(events))
+
+
+# ---------------------------------------------------------------------------
+# Internal helpers
+# ---------------------------------------------------------------------------
+
+def _skipped_analysis(timeline: TimelineResponse) -> Optional[LogicAnalysisResult]:
+    """
+    The empty result for timelines too short to cross-reference, or None
+    when the analysis has to run.
+    """
     if not timeline.events:
         logger.warning("detect_contradictions called with an empty events list. Returning empty result.")
         return LogicAnalysisResult(
@@ -173,47 +310,79 @@ async def detect_contradictions(
             risk_level="NONE",
             analysis_notes="Zaman çizelgesinde olay bulunamadığı için çelişki analizi yapılamadı.",
         )
+    if len(timeline.events) < MIN_EVENTS_FOR_ANALYSIS:
+        logger.info(
+            "Only %d event(s) extracted; skipping contradiction analysis.",
+            len(timeline.events),
+        )
+        return LogicAnalysisResult(
+            contradictions=[],
+            total_contradictions_found=0,
+            risk_level="NONE",
+            analysis_notes="Yetersiz olay sayısı nedeniyle çapraz çelişki analizi yapılmadı.",
+        )
+    return None
 
-    resolved_model = model or DEFAULT_MODEL
-    client = _get_openai_client()
 
-    serialized_events = _serialize_events_for_prompt(timeline.events)
-    user_message = _build_user_message(serialized_events, len(timeline.events))
+def _result_cache_key(serialized_events: str, resolved_model: str) -> str:
+    """
+    Disk cache key of one analysis: the events as the model sees them, the
+    model, and the system prompt's digest (a prompt edit invalidates entries).
+    """
+    return hashlib.sha256(
+        f"{serialized_events}|{resolved_model}|"
+        f"{ANALYSIS_TEMPERATURE}|{_PROMPT_DIGEST}".encode("utf-8")
+    ).hexdigest()
 
-    messages: list[ChatCompletionMessageParam] = [
-        {"role": "system", "content": LOGIC_SYSTEM_PROMPT},
-        {"role": "user", "content": user_message},
-    ]
 
+async def _request_analysis(
+    events: list[TimelineEvent],
+    resolved_model: str,
+    serialized_events: Optional[str] = None,
+) -> LogicAnalysisResult:
+    """
+    Performs the actual OpenAI call(s) for `detect_contradictions`: one call
+    for normal timelines, parallel per-window calls merged for long ones.
+    `serialized_events`, if given, is `events` already serialized for the prompt.
+    """
+    if len(events) < WINDOWED_ANALYSIS_MIN_EVENTS:
+        return await _analyze_window(events, 0, resolved_model, serialized_events)
+
+    windows = _event_windows(len(events))
+    logger.info(
+        "Timeline has %d events; analyzing %d overlapping windows in parallel.",
+        len(events),
+        len(windows),
+    )
+    semaphore = asyncio.Semaphore(MAX_PARALLEL_WINDOWS)
+
+    async def analyze_bounded(start: int, end: int) -> LogicAnalysisResult:
+        async with semaphore:
+            return await _analyze_window(events[start:end], start, resolved_model)
+
+    parts = await asyncio.gather(*(analyze_bounded(start, end) for start, end in windows))
+    return _merge_window_results(list(parts))
+
+
+async def _analyze_window(
+    events: list[TimelineEvent],
+    offset: int,
+    resolved_model: str,
+    serialized_events: Optional[str] = None,
+) -> LogicAnalysisResult:
+    """
+    Runs a single analysis call over `events`, which start at index `offset`
+    of the full timeline; the returned event ids are shifted by `offset`.
+    """
     logger.info(
         "Starting contradiction analysis on %d events using model '%s'.",
-        len(timeline.events),
+        len(events),
         resolved_model,
     )
 
-    try:
-        response = await client.chat.completions.create(
-            model=resolved_model,
-            messages=messages,
-            temperature=ANALYSIS_TEMPERATURE,
-            response_format=_build_structured_response_format(),
-        )
-    except OpenAIError as exc:
-        if _should_fallback_to_json_object(exc):
-            logger.warning(
-                "Structured output unsupported for this deployment/API version. "
-                "Falling back to json_object mode. Error: %s",
-                exc,
-            )
-            response = await client.chat.completions.create(
-                model=resolved_model,
-                messages=messages,
-                temperature=ANALYSIS_TEMPERATURE,
-                response_format={"type": "json_object"},
-            )
-        else:
-            logger.error("Azure OpenAI API call failed in logic analyzer: %s", exc)
-            raise
+    response = await _create_completion(
+        _build_messages(events, serialized_events), resolved_model
+    )
 
     raw_content = response.choices[0].message.content
 
@@ -223,63 +392,167 @@ async def detect_contradictions(
             "This may be a transient API issue — please retry."
         )
 
-    logger.info(
-        "Logic analysis response received. Finish reason: '%s'. "
-        "Tokens — prompt: %d, completion: %d.",
-        response.choices[0].finish_reason,
-        response.usage.prompt_tokens if response.usage else -1,
-        response.usage.completion_tokens if response.usage else -1,
-    )
+    if logger.isEnabledFor(logging.INFO):
+        usage = response.usage
+        logger.info(
+            "Logic analysis response received. Finish reason: '%s'. "
+            "Tokens — prompt: %d (cached: %d), completion: %d.",
+            response.choices[0].finish_reason,
+            usage.prompt_tokens if usage else -1,
+            cached_prompt_tokens(usage),
+            usage.completion_tokens if usage else -1,
+        )
 
-    return _parse_and_validate(raw_content, total_events=len(timeline.events))
+    result = _parse_and_validate(raw_content, total_events=len(events))
+    if offset:
+        for contradiction in result.contradictions:
+            ids = contradiction.involved_event_ids
+            contradiction.involved_event_ids = [i + offset for i in ids]
+    return result
 
 
-# ---------------------------------------------------------------------------
-# Internal helpers
-# ---------------------------------------------------------------------------
+def _build_messages(
+    events: list[TimelineEvent],
+    serialized_events: Optional[str] = None,
+) -> list[ChatCompletionMessageParam]:
+    """
+    Builds the system + user messages for one analysis call.
+    """
+    if serialized_events is None:
+        serialized_events = _serialize_events_for_prompt(events)
+    user_message = _build_user_message(serialized_events, len(events))
+    return [_SYSTEM_MESSAGE, {"role": "user", "content": user_message}]
 
-def _get_openai_client() -> AsyncAzureOpenAI:
-    api_key  = os.getenv("AZURE_OPENAI_API_KEY")
-    endpoint = os.getenv("AZURE_OPENAI_ENDPOINT")
-    version  = os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview")
-    if not api_key or not endpoint:
-        raise ValueError(
-            "AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT environment variables "
-            "must be set. Please add them to your .env file."
+
+async def _create_completion(
+    messages: list[ChatCompletionMessageParam],
+    resolved_model: str,
+    **kwargs: Any,
+) -> Any:
+    """
+    Calls chat.completions.create with json_schema structured output,
+    retrying once in json_object mode when the deployment rejects it.
+    Extra keyword arguments (e.g. stream=True) are passed through.
+    """
+    if get_azure_config().prompt_cache_key:
+        kwargs.setdefault("extra_body", {"prompt_cache_key": _PROMPT_CACHE_KEY})
+
+    client = get_openai_client()
+    use_schema = supports_json_schema(resolved_model)
+    try:
+        return await client.chat.completions.create(
+            model=resolved_model,
+            messages=messages,
+            temperature=ANALYSIS_TEMPERATURE,
+            response_format=(
+                _STRUCTURED_RESPONSE_FORMAT if use_schema else _JSON_OBJECT_RESPONSE_FORMAT
+            ),
+            **kwargs,
         )
-    return AsyncAzureOpenAI(
-        api_key=api_key,
-        azure_endpoint=endpoint,
-        api_version=version,
-        max_retries=MAX_RETRIES,
+    except OpenAIError as exc:
+        if not use_schema or not should_fallback_to_json_object(exc):
+            logger.error("Azure OpenAI API call failed in logic analyzer: %s", exc)
+            raise
+        mark_json_schema_unsupported(resolved_model)
+        logger.warning(
+            "Structured output unsupported for this deployment/API version. "
+            "Falling back to json_object mode. Error: %s",
+            exc,
+        )
+        return await client.chat.completions.create(
+            model=resolved_model,
+            messages=messages,
+            temperature=ANALYSIS_TEMPERATURE,
+            response_format=_JSON_OBJECT_RESPONSE_FORMAT,
+            **kwargs,
+        )
+
+
+def _event_windows(event_count: int) -> list[tuple[int, int]]:
+    """
+    Splits `event_count` events into (start, end) windows of
+    ANALYSIS_WINDOW_SIZE that overlap by ANALYSIS_WINDOW_OVERLAP events.
+    """
+    step = ANALYSIS_WINDOW_SIZE - ANALYSIS_WINDOW_OVERLAP
+    windows: list[tuple[int, int]] = []
+    start = 0
+    while True:
+        end = min(start + ANALYSIS_WINDOW_SIZE, event_count)
+        windows.append((start, end))
+        if end == event_count:
+            return windows
+        start += step
+
+
+def _merge_window_results(parts: list[LogicAnalysisResult]) -> LogicAnalysisResult:
+    """
+    Merges per-window results: contradictions found in two overlapping windows
+    (same title and event ids) are kept once with the higher confidence, the
+    list is re-ordered by severity then confidence, and the risk level is the
+    highest any window reported.
+    """
+    merged: dict[tuple[str, tuple[int, ...]], Contradiction] = {}
+    for part in parts:
+        for contradiction in part.contradictions:
+            key = (contradiction.title.strip().casefold(), tuple(contradiction.involved_event_ids))
+            kept = merged.get(key)
+            if kept is None or contradiction.confidence_score > kept.confidence_score:
+                merged[key] = contradiction
+
+    contradictions = sorted(
+        merged.values(),
+        key=lambda c: (_SEVERITY_RANK[c.severity], -c.confidence_score),
+    )
+    notes = list(dict.fromkeys(part.analysis_notes for part in parts if part.analysis_notes))
+    return LogicAnalysisResult(
+        contradictions=contradictions,
+        total_contradictions_found=len(contradictions),
+        risk_level=min((part.risk_level for part in parts), key=_RISK_RANK.__getitem__),
+        analysis_notes=" ".join(notes) or None,
     )
 
 
 def _serialize_events_for_prompt(events: list[TimelineEvent]) -> str:
     """
-    Converts a list of TimelineEvent objects into a compact, numbered JSON array
-    string that the LLM can parse and reference by 0-based index.
+    Converts a list of TimelineEvent objects into compact, numbered JSON Lines
+    (one event object per line) that the LLM can reference by 0-based index.
 
     Only includes fields relevant to contradiction detection (omits significance
-    to reduce token count and avoid biasing the model toward already-flagged items).
+    to reduce token count and avoid biasing the model toward already-flagged items),
+    with at most MAX_PROMPT_ENTITIES entities per event. Indentation and array
+    punctuation cost tokens and tell the model nothing, so neither is emitted.
 
     Example output (2 events):
-        [
-          {"id": 0, "date": "2019-03-15", "description": "...", "entities": [...], "category": "..."},
-          {"id": 1, "date": "2020-09-01", "description": "...", "entities": [...], "category": "..."}
-        ]
-    """
-    serializable: list[dict[str, Any]] = []
-    for idx, event in enumerate(events):
-        serializable.append({
+        {"id":0,"date":"2019-03-15","description":"...","source_page":1,"entities":[...],"category":"..."}
+        {"id":1,"date":"2020-09-01","description":"...","source_page":2,"entities":[...],"category":"..."}
+    """
+    lines = [
+        orjson.dumps({
             "id": idx,
             "date": event.date,
             "description": event.description,
             "source_page": event.source_page,
-            "entities": event.entities,
+            "entities": _trim_entities(event.entities),
             "category": event.category,
         })
-    return json.dumps(serializable, ensure_ascii=False, indent=2)
+        for idx, event in enumerate(events)
+    ]
+    return b"\n".join(lines).decode()
+
+
+def _trim_entities(entities: list[str]) -> list[str]:
+    """
+    Drops repeated entities (case-insensitively) and keeps the first
+    MAX_PROMPT_ENTITIES, in the order the extractor listed them.
+    """
+    if len(entities) <= 1:
+        return entities
+    seen: dict[str, str] = {}
+    for entity in entities:
+        seen.setdefault(entity.strip().casefold(), entity)
+        if len(seen) == MAX_PROMPT_ENTITIES:
+            break
+    return list(seen.values())
 
 
 def _build_user_message(serialized_events: str, event_count: int) -> str:
@@ -288,12 +561,13 @@ def _build_user_message(serialized_events: str, event_count: int) -> str:
     """
     return (
         f"Aşağıda, bir hukuki belgeden çıkarılmış {event_count} adet zaman çizelgesi olayı "
-        f"bulunmaktadır. Her olay, dizideki konumuna karşılık gelen bir `id` alanına sahiptir "
-        f"(0-tabanlı indeks). `involved_event_ids` alanında bu `id` değerlerini kullan.\n\n"
+        f"bulunmaktadır. Her satır bir olaydır (tek satırlık bir JSON nesnesi). Her olay, "
+        f"sıradaki konumuna karşılık gelen bir `id` alanına sahiptir (0-tabanlı indeks). "
+        f"`involved_event_ids` alanında bu `id` değerlerini kullan.\n\n"
         f"Tüm olayları dikkatle incele, çapraz referanslama yap ve tespit ettiğin tüm "
         f"çelişkileri, mantıksal hataları ve bilgi boşluklarını raporla.\n\n"
         f"OLAYLAR:\n"
-        f"```json\n{serialized_events}\n```"
+        f"```jsonl\n{serialized_events}\n```"
     )
 
 
@@ -309,8 +583,8 @@ def _build_logic_json_schema() -> dict:
         "TIMELINE_IMPOSSIBILITY",
         "MISSING_INFO",
     ]
-    severity_enum = ["HIGH", "MEDIUM", "LOW"]
-    risk_level_enum = ["HIGH", "MEDIUM", "LOW", "NONE"]
+    severity_enum = [s.value for s in Severity]
+    risk_level_enum = [r.value for r in RiskLevel]
 
     contradiction_schema = {
         "type": "object",
@@ -410,19 +684,9 @@ def _build_structured_response_format() -> dict[str, Any]:
     }
 
 
-def _should_fallback_to_json_object(exc: OpenAIError) -> bool:
-    """
-    Returns True when the API/deployment rejects `json_schema` response_format.
-    """
-    message = str(exc).lower()
-    markers = (
-        "json_schema",
-        "response_format",
-        "unsupported",
-        "not supported",
-        "invalid parameter",
-    )
-    return any(marker in message for marker in markers)
+# The schema is static: build the payload once instead of on every call.
+_STRUCTURED_RESPONSE_FORMAT = _build_structured_response_format()
+_JSON_OBJECT_RESPONSE_FORMAT = {"type": "json_object"}
 
 
 def _parse_and_validate(raw_json: str, total_events: int) -> LogicAnalysisResult:
@@ -431,28 +695,26 @@ def _parse_and_validate(raw_json: str, total_events: int) -> LogicAnalysisResult
     Also performs bounds-checking: any event_id >= total_events is silently
     clamped out to prevent index-out-of-range errors in the frontend.
     """
+    # pydantic-core parses and validates in one pass; the `total_events`
+    # context makes Contradiction clamp out-of-range event ids while doing so.
+    error: str | None = None
     try:
-        data = json.loads(raw_json)
-    except json.JSONDecodeError as exc:
-        logger.error("Failed to parse logic analyzer JSON: %s\nRaw: %.500s", exc, raw_json)
-        raise ValueError(f"Logic analyzer returned malformed JSON: {exc}") from exc
-
-    # Clamp out-of-bounds event IDs before Pydantic sees them.
-    for contradiction in data.get("contradictions", []):
-        ids = contradiction.get("involved_event_ids", [])
-        valid_ids = [i for i in ids if 0 <= i < total_events]
-        if len(valid_ids) != len(ids):
-            logger.warning(
-                "Clamped invalid event IDs %s → %s (total_events=%d)",
-                ids, valid_ids, total_events,
-            )
-        contradiction["involved_event_ids"] = valid_ids if valid_ids else [0]
-
-    try:
-        result = LogicAnalysisResult(**data)
-    except Exception as exc:
-        logger.error("Pydantic validation failed for logic analyzer response: %s", exc)
-        raise ValueError(f"Logic analyzer response failed schema validation: {exc}") from exc
+        result = LogicAnalysisResult.model_validate_json(
+            raw_json, context={"total_events": total_events}
+        )
+    except ValidationError as exc:
+        # Only types, locations and messages: the input is case-document text.
+        errors = exc.errors(include_url=False, include_input=False)
+        if any(e["type"] == "json_invalid" for e in errors):
+            logger.error("Failed to parse logic analyzer JSON: %s", errors)
+            error = "Logic analyzer returned malformed JSON."
+        else:
+            logger.error("Pydantic validation failed for logic analyzer response: %s", errors)
+            error = f"Logic analyzer response failed schema validation ({len(errors)} errors)."
+    if error is not None:
+        # Raised outside the except block so the ValidationError (which holds
+        # the raw response) is not kept alive as the ValueError's context.
+        raise ValueError(error)
 
     # Sanity-check: ensure count matches list length.
     actual = len(result.contradictions)
@@ -467,7 +729,7 @@ def _parse_and_validate(raw_json: str, total_events: int) -> LogicAnalysisResult
     logger.info(
         "Logic analysis complete. %d contradictions detected. Risk level: %s.",
         actual,
-        result.risk_level,
+        result.risk_level.value,
     )
     return result
 
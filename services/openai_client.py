@@ -0,0 +1,236 @@
+﻿"""
+LexTimeline - Shared Azure OpenAI Client
+One AsyncAzureOpenAI instance (and therefore one connection pool) for the
+timeline extractor, the logic analyzer and the /chat assistant, so the second
+LLM call of /analyze/deep rides the connection the first one opened and chat
+turns reuse it too.
+"""
+
+import logging
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Optional
+
+import httpx
+from openai import AsyncAzureOpenAI, OpenAIError
+
+logger = logging.getLogger(__name__)
+
+# Client-level retries for 408/409/429/5xx and connection errors. The SDK backs
+# off exponentially with jitter (0.5s doubling up to 8s, minus up to 25%) and
+# honours a Retry-After of up to 60s, which Azure sends with 429s. Batch
+# workloads that hit the rate limit can raise it with AZURE_OPENAI_MAX_RETRIES.
+MAX_RETRIES = 2
+# Default number of documents `extract_timelines` sends to Azure at once;
+# LLM_CONCURRENCY overrides it per deployment (size it to the RPM/TPM quota).
+MAX_PARALLEL_DOCUMENTS = 6
+KEEPALIVE_EXPIRY_SECONDS = 600.0
+
+# A connection warmed this recently is still in the keep-alive pool, so a new
+# warm-up would only cost an extra round-trip.
+WARM_UP_INTERVAL_SECONDS = KEEPALIVE_EXPIRY_SECONDS / 2
+
+# Error text of a request rejected because the deployment/API version does not
+# support `json_schema` response_format.
+_JSON_SCHEMA_UNSUPPORTED_RE = re.compile(
+    r"json_schema|response_format|unsupported|not supported|invalid[ _]parameter",
+    re.IGNORECASE,
+)
+_UNSUPPORTED_PARAMETER_CODES = {"unsupported_parameter", "unsupported_value"}
+
+# Deployments known to reject `json_schema`; calls to them go straight to
+# json_object mode instead of paying for a failing round-trip first. Scoped
+# to the process, i.e. to the one API version the shared client uses.
+_json_schema_unsupported: set[str] = set()
+
+
+@dataclass(frozen=True)
+class AzureConfig:
+    """Azure OpenAI settings, snapshotted from the environment."""
+    api_key: Optional[str]
+    endpoint: Optional[str]
+    api_version: str
+    deployment: str
+    chat_deployment: str = "gpt-4.1"
+    # Send `prompt_cache_key` so calls sharing a prompt prefix are routed to the
+    # same prompt cache. Opt-in: older API versions reject unknown parameters.
+    prompt_cache_key: bool = False
+    max_retries: int = MAX_RETRIES
+    llm_concurrency: int = MAX_PARALLEL_DOCUMENTS
+
+
+_config: Optional[AzureConfig] = None
+_client: Optional[AsyncAzureOpenAI] = None
+_last_warm_up = float("-inf")
+
+
+def get_azure_config() -> AzureConfig:
+    """
+    Returns the Azure settings, reading AZURE_OPENAI_* environment variables on
+    first use only. Lazy rather than at import time, so values loaded from
+    `.env` during app start-up are seen.
+    """
+    global _config
+    if _config is None:
+        _config = AzureConfig(
+            api_key=os.getenv("AZURE_OPENAI_API_KEY"),
+            endpoint=os.getenv("AZURE_OPENAI_ENDPOINT"),
+            api_version=os.getenv("AZURE_OPENAI_API_VERSION", "2024-12-01-preview"),
+            deployment=os.getenv("AZURE_OPENAI_DEPLOYMENT_NAME", "gpt-4.1"),
+            chat_deployment=os.getenv("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME", "gpt-4.1"),
+            prompt_cache_key=(
+                os.getenv("AZURE_OPENAI_PROMPT_CACHE_KEY", "").lower() in {"1", "true"}
+            ),
+            max_retries=_int_env("AZURE_OPENAI_MAX_RETRIES", MAX_RETRIES, minimum=0),
+            llm_concurrency=_int_env("LLM_CONCURRENCY", MAX_PARALLEL_DOCUMENTS, minimum=1),
+        )
+    return _config
+
+
+def _int_env(name: str, default: int, *, minimum: int) -> int:
+    """
+    Reads an integer setting, falling back to `default` when unset.
+
+    Raises:
+        ValueError: If the value is not an integer or is below `minimum`.
+    """
+    raw = os.getenv(name, "").strip()
+    if not raw:
+        return default
+    try:
+        value = int(raw)
+    except ValueError:
+        value = None
+    if value is None or value < minimum:
+        raise ValueError(f"{name} must be an integer >= {minimum}, got {raw!r}.")
+    return value
+
+
+def reload_config() -> AzureConfig:
+    """Re-reads the environment (for tests); an existing client is kept."""
+    global _config
+    _config = None
+    return get_azure_config()
+
+
+def get_openai_client() -> AsyncAzureOpenAI:
+    """
+    Returns the process-wide AsyncAzureOpenAI client, building it on first use.
+    Reads credentials from AZURE_OPENAI_* environment variables.
+
+    Raises:
+        ValueError: If required Azure environment variables are not set.
+    """
+    global _client
+    if _client is None:
+        config = get_azure_config()
+        if not config.api_key or not config.endpoint:
+            raise ValueError(
+                "AZURE_OPENAI_API_KEY and AZURE_OPENAI_ENDPOINT environment variables "
+                "must be set. Please add them to your .env file."
+            )
+        _client = AsyncAzureOpenAI(
+            api_key=config.api_key,
+            azure_endpoint=config.endpoint,
+            api_version=config.api_version,
+            max_retries=config.max_retries,
+            http_client=_build_http_client(),
+        )
+    return _client
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    """
+    HTTP/2 keep-alive pool for the analysis passes and /chat.
+
+    HTTP/2 multiplexes concurrent /analyze pipelines and chats over one TLS
+    connection, and the long keep-alive expiry keeps it open between uploads
+    and chat turns. The default read timeout is generous because a full
+    timeline extraction can take minutes; /chat passes a shorter per-request
+    timeout. Transport-level retries cover connect failures only; HTTP-level
+    retries stay with the SDK's `max_retries`. httpx ignores client-level
+    `http2`/`limits` when a transport is given, so both are set on the
+    transport.
+    """
+    transport = httpx.AsyncHTTPTransport(
+        http2=True,
+        retries=2,
+        # Sized for bursty /chat traffic sharing the pool with /analyze (the
+        # analysis passes alone needed 64/32): room for HTTP/1.1 fallback
+        # bursts, while HTTP/2 normally keeps this to a few connections.
+        limits=httpx.Limits(
+            max_connections=200,
+            max_keepalive_connections=50,
+            keepalive_expiry=KEEPALIVE_EXPIRY_SECONDS,
+        ),
+    )
+    return httpx.AsyncClient(
+        transport=transport,
+        timeout=httpx.Timeout(connect=5.0, read=300.0, write=30.0, pool=10.0),
+    )
+
+
+async def warm_up_connection() -> None:
+    """
+    Opens (TCP + TLS) a pooled connection to the Azure endpoint with a cheap,
+    token-free model listing, so a following completion call skips the
+    handshake. Meant to overlap with local work such as PDF parsing.
+
+    Never raises: a failed warm-up just means the real call connects itself.
+    """
+    global _last_warm_up
+    now = time.monotonic()
+    if now - _last_warm_up < WARM_UP_INTERVAL_SECONDS:
+        return
+    _last_warm_up = now
+    try:
+        await get_openai_client().models.list()
+    except Exception as exc:
+        logger.debug("OpenAI connection warm-up failed: %s", exc)
+
+
+def should_fallback_to_json_object(exc: OpenAIError) -> bool:
+    """
+    Returns True when the API/deployment rejects `json_schema` response_format.
+
+    Only a 400 (or an error without a status, e.g. from an older SDK) can be
+    that rejection; rate limits, timeouts and server errors never fall back.
+    """
+    status_code = getattr(exc, "status_code", None)
+    if status_code is not None and status_code != 400:
+        return False
+    if getattr(exc, "code", None) in _UNSUPPORTED_PARAMETER_CODES:
+        return True
+    return bool(_JSON_SCHEMA_UNSUPPORTED_RE.search(str(exc)))
+
+
+def cached_prompt_tokens(usage: Any) -> int:
+    """
+    Prompt tokens served from Azure's prefix cache, or -1 when the API
+    version does not report them.
+    """
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", None)
+    return cached if cached is not None else -1
+
+
+def supports_json_schema(deployment: str) -> bool:
+    """False once `deployment` has rejected `json_schema` in this process."""
+    return deployment not in _json_schema_unsupported
+
+
+def mark_json_schema_unsupported(deployment: str) -> None:
+    """Records that `deployment` rejects `json_schema` response_format."""
+    if deployment not in _json_schema_unsupported:
+        _json_schema_unsupported.add(deployment)
+        logger.info("Deployment '%s' will use json_object mode from now on.", deployment)
+
+
+async def close_openai_client() -> None:
+    """Closes the shared client's connection pool (called on app shutdown)."""
+    global _client
+    if _client is not None:
+        await _client.close()
+        _client = None
@@ -6,17 +6,58 @@ Returns per-page text with page numbers preserved.
 
 import fitz  # PyMuPDF
 import logging
-from typing import List, Tuple
+import math
+import re
+from collections import Counter
+from typing import List, Optional, Set, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Extraction flavor / flags.
+# "blocks" and "text" are the cheap MuPDF flavors: both are read straight off
+# the page's TextPage (building that TextPage is the dominant per-page cost),
+# whereas "dict"/"json"/"xml" materialize every line and span and are many
+# times slower. "blocks" costs the same as "text" on our sample corpus but
+# keeps block boundaries, which we turn into paragraph breaks. Flags are the
+# plain-text defaults: no image blocks, no per-character data.
+_TEXT_FLAGS = fitz.TEXTFLAGS_BLOCKS & ~fitz.TEXT_PRESERVE_IMAGES
+
+# Whitespace clean-up before the text is billed as prompt tokens: runs of
+# spaces/tabs (justified or column-aligned text) become one space, and a word
+# hyphenated across a line break is re-joined. Only a letter-hyphen-newline
+# followed by a lowercase letter counts, so list dashes ("- Davacı"), date and
+# number ranges and hyphenated proper names are left alone.
+_INLINE_SPACE_RE = re.compile(r"[ \t\u00a0]+")
+_LINE_BREAK_HYPHEN_RE = re.compile(r"(?<=[^\W\d_])-\n(?=[a-zçğıöşü])")
+
+# Page selection for documents over the prompt budget: pages are ranked with
+# Okapi BM25 against a fixed "legal event" query, so the pages dropped are the
+# ones least likely to contain dated procedural events.
+_BM25_K1 = 1.5
+_BM25_B = 0.75
+_STEM_LENGTH = 5  # Turkish is agglutinative; a 5-char prefix is a cheap stemmer.
+_DATE_TOKEN = "<tarih>"
+_DATE_RE = re.compile(
+    r"\b\d{1,2}[./-]\d{1,2}[./-]\d{2,4}\b|\b(?:19|20)\d{2}-\d{2}-\d{2}\b"
+)
+_WORD_RE = re.compile(r"\w+")
+_TURKISH_LOWER = str.maketrans({"İ": "i", "I": "ı"})
+_SALIENCE_QUERY = (
+    "tarih mahkeme karar hüküm tebligat tebliğ esas dava davacı davalı dilekçe "
+    "duruşma celse tanık ifade beyan bilirkişi rapor sözleşme ihtarname icra "
+    "takip temyiz istinaf ödeme"
+)
+
 
 class PDFParsingError(Exception):
     """Raised when the PDF cannot be parsed or yields no extractable text."""
     pass
 
 
-def extract_text_by_page(file_bytes: bytes) -> List[Tuple[int, str]]:
+def extract_text_by_page(
+    file_bytes: bytes,
+    max_pages: Optional[int] = None,
+) -> List[Tuple[int, str]]:
     """
     Extracts text from a PDF file supplied as raw bytes.
 
@@ -26,6 +67,8 @@ def extract_text_by_page(file_bytes: bytes) -> List[Tuple[int, str]]:
 
     Args:
         file_bytes: The raw bytes of the PDF file received from the upload.
+        max_pages:  Only the first `max_pages` pages are loaded; the rest are
+                    never touched by MuPDF. None means all pages.
 
     Returns:
         A list of (page_number, page_text) tuples, where page_number is
@@ -47,14 +90,18 @@ def extract_text_by_page(file_bytes: bytes) -> List[Tuple[int, str]]:
     total_pages = len(pdf_document)
     logger.info("PDF opened successfully. Total pages: %d", total_pages)
 
+    pages_to_read = total_pages
+    if max_pages is not None and total_pages > max_pages:
+        logger.info("Page cap %d reached; skipping the last %d pages.", max_pages, total_pages - max_pages)
+        pages_to_read = max_pages
+
     pages_with_text: List[Tuple[int, str]] = []
 
-    for page_index in range(total_pages):
+    for page_index in range(pages_to_read):
         page_number = page_index + 1  # Convert to 1-indexed
         page = pdf_document[page_index]
 
-        # Extract using "blocks" for best reading-order accuracy.
-        # Each block is a dict; "lines" within contain "spans" with text.
+        # Extract using "blocks" for reading order; each block is a plain tuple.
         page_text = _extract_page_text(page, page_number)
 
         if page_text.strip():
@@ -79,16 +126,29 @@ def extract_text_by_page(file_bytes: bytes) -> List[Tuple[int, str]]:
     logger.info(
         "Extraction complete. %d/%d pages contained text.",
         len(pages_with_text),
-        total_pages,
+        pages_to_read,
     )
     return pages_with_text
 
 
+def warm_up() -> None:
+    """
+    Runs a blank in-memory page through the extraction path once, so the
+    first real upload does not pay MuPDF's (or the worker thread's) start-up.
+    Call it on the same executor the parser runs on.
+    """
+    document = fitz.open()
+    try:
+        _extract_page_text(document.new_page(), 1)
+    finally:
+        document.close()
+
+
 def _extract_page_text(page: fitz.Page, page_number: int) -> str:
     """
     Extracts and cleans text from a single PyMuPDF Page object.
 
-    Uses the 'dict' extraction mode (block → line → span) to produce
+    Uses the cheap 'blocks' extraction flavor (see `_TEXT_FLAGS`) to produce
     well-ordered text, then applies lightweight cleaning heuristics:
     - Strips excessive blank lines.
     - Preserves paragraph breaks (double newlines).
@@ -103,12 +163,15 @@ def _extract_page_text(page: fitz.Page, page_number: int) -> str:
     """
     text_blocks: List[str] = []
 
+    # Building the TextPage is the expensive step; both the primary path and
+    # the fallback read from this one instead of each building their own.
+    textpage = page.get_textpage(flags=_TEXT_FLAGS)
     try:
-        blocks = page.get_text("blocks")  # List of (x0, y0, x1, y1, text, block_no, block_type)
-        # Sort by vertical position (y0), then horizontal (x0) for reading order.
-        blocks_sorted = sorted(blocks, key=lambda b: (b[1], b[0]))
+        # List of (x0, y0, x1, y1, text, block_no, block_type). sort=True has
+        # MuPDF return them in reading order (top-to-bottom, left-to-right).
+        blocks = page.get_text("blocks", textpage=textpage, sort=True)
 
-        for block in blocks_sorted:
+        for block in blocks:
             # block[6] == 0 means text block (not image block)
             if block[6] == 0:
                 raw_text = block[4]
@@ -119,7 +182,7 @@ def _extract_page_text(page: fitz.Page, page_number: int) -> str:
     except Exception as exc:  # noqa: BLE001
         logger.error("Error extracting text from page %d: %s", page_number, exc)
         # Fallback to simple text extraction.
-        text_blocks = [page.get_text("text")]
+        text_blocks = [page.get_text("text", textpage=textpage)]
 
     page_text = "\n\n".join(text_blocks)
     # Prepend a clear page marker so the LLM can track source pages.
@@ -131,7 +194,8 @@ def _clean_block_text(text: str) -> str:
     Applies basic cleaning to a raw text block from PyMuPDF.
 
     - Removes lines that are only whitespace.
-    - Collapses 3+ consecutive newlines into 2.
+    - Collapses runs of spaces/tabs into a single space.
+    - Re-joins words hyphenated across a line break.
     - Strips leading/trailing whitespace.
 
     Args:
@@ -140,10 +204,10 @@ def _clean_block_text(text: str) -> str:
     Returns:
         Cleaned text string.
     """
-    # Remove lines that are entirely whitespace.
-    lines = [line for line in text.splitlines() if line.strip()]
-    cleaned = "\n".join(lines)
-    return cleaned.strip()
+    # Collapse inline whitespace, then drop lines that are entirely whitespace.
+    lines = [line.strip() for line in _INLINE_SPACE_RE.sub(" ", text).splitlines()]
+    cleaned = "\n".join(line for line in lines if line)
+    return _LINE_BREAK_HYPHEN_RE.sub("", cleaned)
 
 
 def build_prompt_text(pages: List[Tuple[int, str]], max_chars: int = 120_000) -> str:
@@ -151,8 +215,9 @@ def build_prompt_text(pages: List[Tuple[int, str]], max_chars: int = 120_000) ->
     Concatenates per-page text into a single string suitable for the LLM prompt.
 
     Applies a character cap (`max_chars`) to avoid exceeding model context
-    windows. If the document is truncated, a warning marker is appended so the
-    LLM is aware the document was cut off.
+    windows. Over the cap, whole pages are kept by BM25 "legal event" salience
+    (in original page order) instead of cutting the tail off; a warning marker
+    naming the omitted pages is appended so the LLM knows the text is partial.
 
     Args:
         pages:     Output of `extract_text_by_page`.
@@ -160,22 +225,124 @@ def build_prompt_text(pages: List[Tuple[int, str]], max_chars: int = 120_000) ->
                    (~30,000 tokens) — safe for gpt-4.1's 128k context.
 
     Returns:
-        A single string of all page text, potentially truncated.
+        A single string of all (or the most salient) page text.
     """
-    combined_parts = [text for _, text in pages]
-    full_text = "\n\n".join(combined_parts)
-
-    if len(full_text) > max_chars:
+    # Length of the "\n\n"-joined text, computed without building it.
+    total_chars = sum(len(text) for _, text in pages) + 2 * max(len(pages) - 1, 0)
+    if total_chars <= max_chars:
+        return "\n\n".join(text for _, text in pages)
+
+    selected = _select_salient_pages(pages, max_chars)
+    if not selected:
+        # Not even the best page fits on its own: fall back to a hard cut.
         logger.warning(
             "Document text (%d chars) exceeds max_chars limit (%d). Truncating.",
-            len(full_text),
+            total_chars,
             max_chars,
         )
-        full_text = full_text[:max_chars] + (
+        return _join_truncated(pages, max_chars) + (
             "\n\n[UYARI: Belge içeriği bağlam penceresi sınırı nedeniyle kesildi. "
             "Yukarıdaki tüm bilgiler analiz edildi; geri kalan sayfalar dahil edilmedi.]"
         )
 
-    return full_text
+    omitted = [page_number for page_number, _ in pages if page_number not in selected]
+    logger.warning(
+        "Document text (%d chars) exceeds max_chars limit (%d). "
+        "Keeping %d/%d most event-dense pages.",
+        total_chars,
+        max_chars,
+        len(selected),
+        len(pages),
+    )
+    kept_text = "\n\n".join(text for page_number, text in pages if page_number in selected)
+    return kept_text + (
+        "\n\n[UYARI: Belge bağlam penceresi sınırını aştığı için yalnızca olay "
+        "içermesi en olası sayfalar dahil edildi. Dahil edilmeyen sayfalar: "
+        f"{_format_page_ranges(omitted)}.]"
+    )
+
+
+def _join_truncated(pages: List[Tuple[int, str]], max_chars: int) -> str:
+    """
+    The first `max_chars` characters of the "\n\n"-joined page text, built
+    from only the pages that reach into the cut.
+    """
+    parts: List[str] = []
+    remaining = max_chars
+    for _, text in pages:
+        piece = ("\n\n" + text) if parts else text
+        if len(piece) >= remaining:
+            parts.append(piece[:remaining])
+            break
+        parts.append(piece)
+        remaining -= len(piece)
+    return "".join(parts)
+
+
+def _select_salient_pages(pages: List[Tuple[int, str]], max_chars: int) -> Set[int]:
+    """
+    Greedily picks the highest-scoring pages (BM25 against `_SALIENCE_QUERY`)
+    whose joined text fits in `max_chars`. Returns the selected page numbers.
+    """
+    docs = [_tokenize(text) for _, text in pages]
+    scores = _bm25_scores(docs, _tokenize(_SALIENCE_QUERY))
+    ranked = sorted(range(len(pages)), key=lambda i: (-scores[i], i))
+
+    selected: Set[int] = set()
+    used = 0
+    for i in ranked:
+        page_number, text = pages[i]
+        cost = len(text) + (2 if selected else 0)  # "\n\n" separator
+        if used + cost <= max_chars:
+            selected.add(page_number)
+            used += cost
+    return selected
+
+
+def _tokenize(text: str) -> List[str]:
+    """Lowercases (Turkish-aware), stems to a fixed prefix and tags dates."""
+    dates = [_DATE_TOKEN] * len(_DATE_RE.findall(text))
+    words = _WORD_RE.findall(text.translate(_TURKISH_LOWER).lower())
+    return [w[:_STEM_LENGTH] for w in words if not w.isdigit()] + dates
+
+
+def _bm25_scores(docs: List[List[str]], query: List[str]) -> List[float]:
+    """Okapi BM25 score of every tokenized document against `query`."""
+    n_docs = len(docs)
+    avg_len = sum(len(d) for d in docs) / n_docs or 1.0
+    doc_freq: Counter = Counter()
+    for doc in docs:
+        doc_freq.update(set(doc))
+
+    query_terms = set(query) | {_DATE_TOKEN}
+    idf = {
+        term: math.log((n_docs - doc_freq[term] + 0.5) / (doc_freq[term] + 0.5) + 1.0)
+        for term in query_terms
+    }
+
+    scores: List[float] = []
+    for doc in docs:
+        tf = Counter(doc)
+        norm = _BM25_K1 * (1 - _BM25_B + _BM25_B * len(doc) / avg_len)
+        scores.append(sum(
+            idf[term] * tf[term] * (_BM25_K1 + 1) / (tf[term] + norm)
+            for term in query_terms
+            if tf[term]
+        ))
+    return scores
+
+
+def _format_page_ranges(page_numbers: List[int]) -> str:
+    """Formats sorted page numbers compactly, e.g. [3, 4, 5, 9] -> '3-5, 9'."""
+    ranges: List[str] = []
+    start = prev = page_numbers[0]
+    for n in page_numbers[1:] + [None]:
+        if n is not None and n == prev + 1:
+            prev = n
+            continue
+        ranges.append(str(start) if start == prev else f"{start}-{prev}")
+        if n is not None:
+            start = prev = n
+    return ", ".join(ranges)
 
 
@@ -0,0 +1,144 @@
+from fastapi.testclient import TestClient
+
+import main
+from models import Contradiction, LogicAnalysisResult, TimelineEvent, TimelineResponse
+
+
+def _timeline() -> TimelineResponse:
+    return TimelineResponse(
+        events=[
+            TimelineEvent(
+                date="2023-01-01",
+                description="Dava acildi.",
+                source_page=1,
+                category="Dilekce / Basvuru",
+            )
+        ],
+        document_summary="Ozet.",
+        total_events_found=1,
+    )
+
+
+def test_reuploaded_pdf_skips_parse_and_llm_calls(monkeypatch) -> None:
+    main._timeline_cache.clear()
+    main._logic_cache.clear()
+    calls = {"parse": 0, "extract": 0, "logic": 0}
+
+    async def fake_parse(file_bytes, filename, max_pages=None, *, cache_key):
+        calls["parse"] += 1
+        return "metin"
+
+    async def fake_extract(document_text):
+        calls["extract"] += 1
+        return _timeline()
+
+    async def fake_detect(timeline):
+        calls["logic"] += 1
+        return LogicAnalysisResult(contradictions=[], total_contradictions_found=0, risk_level="NONE")
+
+    monkeypatch.setattr(main, "_parse_pdf_to_prompt", fake_parse)
+    monkeypatch.setattr(main, "extract_timeline", fake_extract)
+    monkeypatch.setattr(main, "detect_contradictions", fake_detect)
+
+    client = TestClient(main.app)
+    upload = {"file": ("case.pdf", b"%PDF-1.7 same bytes", "application/pdf")}
+    for path in ("/analyze", "/analyze/deep", "/analyze/deep"):
+        response = client.post(path, files=upload)
+        assert response.status_code == 200
+        assert response.json()["total_events_found"] == 1
+
+    assert calls == {"parse": 1, "extract": 1, "logic": 1}
+
+
+def test_oversized_upload_is_rejected_with_413(monkeypatch) -> None:
+    monkeypatch.setattr(main, "MAX_FILE_SIZE_BYTES", 1024)
+    monkeypatch.setattr(main, "UPLOAD_CHUNK_BYTES", 256)
+    client = TestClient(main.app)
+    upload = {"file": ("big.pdf", b"%PDF-" + b"x" * 4096, "application/pdf")}
+    response = client.post("/analyze", files=upload)
+    assert response.status_code == 413
+
+
+def test_upload_without_pdf_header_is_rejected_before_parsing(monkeypatch) -> None:
+    async def fail_parse(*args, **kwargs):
+        raise AssertionError("non-PDF bytes must not reach the parser")
+
+    monkeypatch.setattr(main, "_parse_pdf_to_prompt", fail_parse)
+    client = TestClient(main.app)
+    upload = {"file": ("fake.pdf", b"PK\x03\x04 not a pdf", "application/pdf")}
+    response = client.post("/analyze", files=upload)
+    assert response.status_code == 400
+
+
+def test_timeline_stream_sends_events_then_done_and_fills_the_cache(monkeypatch) -> None:
+    main._timeline_cache.clear()
+    calls = 0
+
+    async def fake_parse(file_bytes, filename, max_pages=None, *, cache_key):
+        return "metin"
+
+    async def fake_stream(document_text):
+        nonlocal calls
+        calls += 1
+        timeline = _timeline()
+        for event in timeline.events:
+            yield event
+        yield timeline
+
+    monkeypatch.setattr(main, "_parse_pdf_to_prompt", fake_parse)
+    monkeypatch.setattr(main, "extract_timeline_stream", fake_stream)
+
+    client = TestClient(main.app)
+    upload = {"file": ("case.pdf", b"%PDF-1.7 streamed", "application/pdf")}
+    bodies = [client.post("/analyze/stream", files=upload).text for _ in range(2)]
+
+    assert calls == 1
+    assert bodies[0] == bodies[1]
+    assert [line for line in bodies[0].splitlines() if line.startswith("event:")] == [
+        "event: event",
+        "event: done",
+    ]
+
+
+def test_deep_stream_sends_timeline_contradictions_then_done(monkeypatch) -> None:
+    main._timeline_cache.clear()
+    main._logic_cache.clear()
+    calls = 0
+
+    async def fake_extract(document_text):
+        return _timeline()
+
+    async def fake_stream(timeline):
+        nonlocal calls
+        calls += 1
+        contradiction = Contradiction(
+            title="Celiski",
+            contradiction_type="MISSING_INFO",
+            description="Eksik bilgi.",
+            involved_event_ids=[0],
+            severity="LOW",
+            confidence_score=0.4,
+        )
+        yield contradiction
+        yield LogicAnalysisResult(
+            contradictions=[contradiction], total_contradictions_found=1, risk_level="LOW"
+        )
+
+    async def fake_parse(file_bytes, filename, max_pages=None, *, cache_key):
+        return "metin"
+
+    monkeypatch.setattr(main, "_parse_pdf_to_prompt", fake_parse)
+    monkeypatch.setattr(main, "extract_timeline", fake_extract)
+    monkeypatch.setattr(main, "detect_contradictions_stream", fake_stream)
+
+    client = TestClient(main.app)
+    upload = {"file": ("case.pdf", b"%PDF-1.7 deep stream", "application/pdf")}
+    bodies = [client.post("/analyze/deep/stream", files=upload).text for _ in range(2)]
+
+    assert calls == 1
+    assert bodies[0] == bodies[1]
+    assert [line for line in bodies[0].splitlines() if line.startswith("event:")] == [
+        "event: timeline",
+        "event: contradiction",
+        "event: done",
+    ]
@@ -1,3 +1,6 @@
+import asyncio
+
+import backend.services.chat_service as chat_service
 from backend.services.chat_service import _build_context_str
 
 
@@ -32,3 +35,111 @@ def test_chat_context_uses_contradiction_type_field() -> None:
     assert "FACTUAL_ERROR" in text
     assert "[Olay #1]" in text
     assert "[Celiski #1]" in text
+
+
+def test_chat_context_is_memoized_per_fingerprint(monkeypatch) -> None:
+    ctx = {"events": [{"date": "2024-01-01", "description": "Dava acildi."}]}
+    calls: list[dict] = []
+
+    def fake_render(c: dict) -> chat_service._RenderedContext:
+        calls.append(c)
+        return chat_service._RenderedContext("", [], [], "rendered")
+
+    chat_service._context_cache.clear()
+    monkeypatch.setattr(chat_service, "_render_context", fake_render)
+
+    first = asyncio.run(chat_service._get_context_str(ctx))
+    second = asyncio.run(chat_service._get_context_str(dict(reversed(list(ctx.items())))))
+
+    assert first == second
+    assert first[1] == "rendered"
+    assert len(calls) == 1
+
+
+def test_identical_concurrent_questions_share_one_completion(monkeypatch) -> None:
+    calls: list[str] = []
+
+    async def fake_complete(client, **kwargs) -> str:
+        calls.append(kwargs["query"])
+        await asyncio.sleep(0.01)
+        return "cevap"
+
+    chat_service._response_cache.clear()
+    monkeypatch.setattr(chat_service, "get_openai_client", lambda: object())
+    monkeypatch.setattr(chat_service, "_complete", fake_complete)
+    ctx = {"events": [{"date": "2024-01-01"}]}
+
+    async def run() -> list[str]:
+        return await asyncio.gather(
+            chat_service.chat_with_case("Ozetle.", ctx),
+            chat_service.chat_with_case("Ozetle.", ctx),
+            chat_service.chat_with_case("Riskler?", ctx),
+        )
+
+    assert asyncio.run(run()) == ["cevap", "cevap", "cevap"]
+    assert sorted(calls) == ["Ozetle.", "Riskler?"]
+    assert not chat_service._inflight
+
+
+def test_oversized_context_drops_low_severity_then_oldest_events(monkeypatch) -> None:
+    monkeypatch.setattr(chat_service, "MAX_CONTEXT_CHARS", 900)
+    ctx = {
+        "events": [{"date": f"2024-01-{i:02d}", "description": "x" * 100} for i in range(1, 6)],
+        "contradictions": [
+            {"title": "Dusuk", "severity": "LOW", "involved_event_ids": [4]},
+            {"title": "Yuksek", "severity": "HIGH", "involved_event_ids": [4]},
+        ],
+    }
+
+    rendered = chat_service._render_context(ctx)
+
+    assert len(rendered.text) <= 900
+    assert "Baslik     : Dusuk" not in rendered.text
+    assert "[Olay #1]" not in rendered.text
+    assert "[Olay #5]" in rendered.text
+    assert len(rendered.event_blocks) == 5
+
+
+def test_question_list_is_answered_in_order(monkeypatch) -> None:
+    async def fake_complete(client, **kwargs) -> str:
+        return f"cevap: {kwargs['query']}"
+
+    chat_service._response_cache.clear()
+    monkeypatch.setattr(chat_service, "get_openai_client", lambda: object())
+    monkeypatch.setattr(chat_service, "_complete", fake_complete)
+    ctx = {"events": [{"date": "2024-01-01"}]}
+
+    answers = asyncio.run(chat_service.chat_with_case(["Ozetle.", "Riskler?"], ctx))
+
+    assert answers == ["cevap: Ozetle.", "cevap: Riskler?"]
+
+
+def test_repeated_question_is_served_from_response_cache(monkeypatch) -> None:
+    calls: list[str] = []
+
+    async def fake_complete(client, **kwargs) -> str:
+        calls.append(kwargs["query"])
+        return "ozet"
+
+    chat_service._response_cache.clear()
+    monkeypatch.setattr(chat_service, "get_openai_client", lambda: object())
+    monkeypatch.setattr(chat_service, "_complete", fake_complete)
+    ctx = {"events": [{"date": "2024-01-01"}]}
+
+    first = asyncio.run(chat_service.chat_with_case("Davayi ozetle.", ctx))
+    second = asyncio.run(chat_service.chat_with_case("  davayi OZETLE ", ctx))
+    asyncio.run(chat_service.chat_with_case("Davayi ozetle.", ctx, temperature=0.0))
+    asyncio.run(chat_service.chat_with_case("Davayi ozetle.", ctx, temperature=0.9))
+    asyncio.run(chat_service.chat_with_case("Davayi ozetle.", ctx, temperature=0.9))
+
+    assert first == second == "ozet"
+    assert len(calls) == 4
+
+
+def test_query_normalization_keeps_operators_and_symbols() -> None:
+    normalize = chat_service._normalize_query
+
+    assert normalize("  Davayi OZETLE? ") == normalize("davayi ozetle.") == "davayi ozetle"
+    assert normalize("Tutar > 5000 TL mi?") != normalize("Tutar < 5000 TL mi?")
+    assert normalize("Olay #3 nedir?") == "olay #3 nedir"
+    assert normalize("%50 indirim var mi") == "%50 indirim var mi"
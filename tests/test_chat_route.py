@@ -1,6 +1,96 @@
+from fastapi.testclient import TestClient
+
+import backend.main_chat_endpoint as main_chat_endpoint
 from main import app
+from services import openai_client
 
 
 def test_chat_route_registered() -> None:
     paths = {route.path for route in app.routes}
     assert "/chat" in paths
+
+
+def test_chat_rejects_context_without_events() -> None:
+    client = TestClient(app)
+    response = client.post("/chat", json={"query": "Ozetle.", "context": {"events": []}})
+    assert response.status_code == 422
+    assert "context.events is empty" in response.json()["detail"]
+
+
+def test_chat_validates_query_without_context_model() -> None:
+    client = TestClient(app)
+    response = client.post("/chat", json={"query": "", "context": {"events": [{}]}})
+    assert response.status_code == 422
+    assert "query" in response.json()["detail"][0]["loc"]
+
+
+def test_chat_stream_emits_sse_deltas(monkeypatch) -> None:
+    async def fake_stream(**kwargs):
+        async def gen():
+            yield "Dava "
+            yield "[Olay #1]"
+
+        return gen()
+
+    monkeypatch.setattr(main_chat_endpoint, "stream_chat_with_case", fake_stream)
+    client = TestClient(app)
+    response = client.post(
+        "/chat/stream",
+        json={"query": "Ozetle.", "context": {"events": [{}]}, "model": "m"},
+    )
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert response.text == (
+        'event: delta\ndata: {"text":"Dava "}\n\n'
+        'event: delta\ndata: {"text":"[Olay #1]"}\n\n'
+        'event: done\ndata: {"model_used":"m"}\n\n'
+    )
+
+
+def test_chat_defaults_to_configured_chat_deployment(monkeypatch) -> None:
+    seen = {}
+
+    async def fake_chat(**kwargs):
+        seen.update(kwargs)
+        return "Cevap."
+
+    config = openai_client.AzureConfig("key", "https://x", "v", "gpt-4.1", chat_deployment="chat-dep")
+    monkeypatch.setattr(openai_client, "_config", config)
+    monkeypatch.setattr(main_chat_endpoint, "chat_with_case", fake_chat)
+    client = TestClient(app)
+    response = client.post("/chat", json={"query": "Ozetle.", "context": {"events": [{}]}})
+
+    assert response.status_code == 200
+    assert seen["model"] == "chat-dep"
+    assert response.json()["model_used"] == "chat-dep"
+
+
+def test_chat_rejects_oversized_body_before_decoding(monkeypatch) -> None:
+    monkeypatch.setattr(main_chat_endpoint, "MAX_CHAT_BODY_BYTES", 64)
+    client = TestClient(app)
+    response = client.post(
+        "/chat",
+        json={"query": "Ozetle.", "context": {"events": [{"description": "x" * 100}]}},
+    )
+    assert response.status_code == 413
+
+
+def test_chat_rejects_non_list_events_with_422() -> None:
+    client = TestClient(app)
+    response = client.post("/chat", json={"query": "Ozetle.", "context": {"events": 5}})
+    assert response.status_code == 422
+    assert "context.events must be a list" in response.json()["detail"]
+
+
+def test_chat_rejects_malformed_context_records_with_422() -> None:
+    client = TestClient(app)
+    for context in (
+        {"events": ["abc"]},
+        {"events": [1, 2]},
+        {"events": [{}], "contradictions": 3},
+        {"events": [{}], "contradictions": [None]},
+    ):
+        response = client.post("/chat", json={"query": "Ozetle.", "context": context})
+        assert response.status_code == 422
+        assert "not an AnalysisResult" in response.json()["detail"]
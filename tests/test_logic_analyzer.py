@@ -0,0 +1,195 @@
+import asyncio
+from types import SimpleNamespace
+
+import orjson
+
+from models import Contradiction, LogicAnalysisResult, TimelineEvent, TimelineResponse
+from services import logic_analyzer
+
+
+def test_single_event_timeline_skips_the_llm_call(monkeypatch) -> None:
+    def no_client():
+        raise AssertionError("the LLM must not be called for a single event")
+
+    monkeypatch.setattr(logic_analyzer, "get_openai_client", no_client)
+    timeline = TimelineResponse(
+        events=[
+            TimelineEvent(
+                date="2023-01-01",
+                description="Dava acildi.",
+                source_page=1,
+                category="Dilekce / Basvuru",
+            )
+        ],
+        document_summary="Ozet.",
+        total_events_found=1,
+    )
+
+    result = asyncio.run(logic_analyzer.detect_contradictions(timeline))
+
+    assert result.contradictions == []
+    assert result.risk_level == "NONE"
+
+
+def test_long_timelines_are_analyzed_in_overlapping_windows(monkeypatch) -> None:
+    windows_seen = []
+
+    async def fake_window(events, offset, resolved_model):
+        windows_seen.append((offset, len(events)))
+        shared = Contradiction(
+            title="Ortak celiski",
+            contradiction_type="FACTUAL_ERROR",
+            description="Iki pencerede de bulundu.",
+            involved_event_ids=[28, 29],
+            severity="LOW",
+            confidence_score=0.5 + offset / 100,
+        )
+        own = shared.model_copy(
+            update={"title": f"Pencere {offset}", "involved_event_ids": [offset], "severity": "HIGH"}
+        )
+        return LogicAnalysisResult(
+            contradictions=[shared, own],
+            total_contradictions_found=2,
+            risk_level="HIGH" if offset else "LOW",
+            analysis_notes="Not.",
+        )
+
+    monkeypatch.setattr(logic_analyzer, "_analyze_window", fake_window)
+    events = [
+        TimelineEvent(date=f"{2000 + n}", description="Olay", source_page=1, category="Diğer")
+        for n in range(60)
+    ]
+    timeline = TimelineResponse(events=events, document_summary="Ozet.", total_events_found=60)
+
+    result = asyncio.run(logic_analyzer.detect_contradictions(timeline))
+
+    assert windows_seen == [(0, 30), (25, 30), (50, 10)]
+    assert [c.title for c in result.contradictions] == [
+        "Pencere 50", "Pencere 25", "Pencere 0", "Ortak celiski",
+    ]
+    assert result.contradictions[-1].confidence_score == 1.0
+    assert result.total_contradictions_found == 4
+    assert result.risk_level == "HIGH"
+    assert result.analysis_notes == "Not."
+
+
+def test_disk_cache_serves_repeat_analyses(monkeypatch, tmp_path) -> None:
+    calls = 0
+
+    async def fake_request(events, resolved_model, serialized_events=None):
+        nonlocal calls
+        calls += 1
+        return LogicAnalysisResult(
+            contradictions=[], total_contradictions_found=0, risk_level="NONE"
+        )
+
+    monkeypatch.setenv("LEXTIMELINE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(logic_analyzer, "_request_analysis", fake_request)
+    events = [
+        TimelineEvent(date=f"202{n}", description="Olay", source_page=1, category="Diğer")
+        for n in range(2)
+    ]
+    timeline = TimelineResponse(events=events, document_summary="Ozet.", total_events_found=2)
+
+    first = asyncio.run(logic_analyzer.detect_contradictions(timeline, model="gpt-4.1"))
+    again = asyncio.run(logic_analyzer.detect_contradictions(timeline, model="gpt-4.1"))
+
+    assert calls == 1
+    assert again == first
+    assert len(list(tmp_path.glob("*.json"))) == 1
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_out_of_range_event_ids_are_clamped_during_validation() -> None:
+    def contradiction(ids):
+        return {
+            "title": "Celiski",
+            "contradiction_type": "FACTUAL_ERROR",
+            "description": "Aciklama.",
+            "involved_event_ids": ids,
+            "severity": "LOW",
+            "confidence_score": 0.5,
+            "legal_basis": None,
+            "recommended_action": None,
+        }
+
+    missing_ids = contradiction(None)
+    del missing_ids["involved_event_ids"]
+    raw = orjson.dumps({
+        "contradictions": [
+            contradiction([2, 7, -1, 2]),
+            contradiction([9]),
+            contradiction(["1", 2.0, "x"]),
+            missing_ids,
+        ],
+        "total_contradictions_found": 4,
+        "risk_level": "LOW",
+        "analysis_notes": None,
+    }).decode()
+
+    result = logic_analyzer._parse_and_validate(raw, total_events=3)
+
+    assert [c.involved_event_ids for c in result.contradictions] == [[2], [0], [1, 2], [0]]
+
+
+def test_prompt_events_are_compact_with_trimmed_entities() -> None:
+    entities = ["Gül Yapı A.Ş.", "gül yapı a.ş.", "Hasan Çelik"] + [f"Tanık {n}" for n in range(8)]
+    events = [
+        TimelineEvent(date="2019", description="Sözleşme", source_page=1, entities=entities, category="Diğer"),
+        TimelineEvent(date="2020", description="Teslim", source_page=2, category="Diğer"),
+    ]
+
+    serialized = logic_analyzer._serialize_events_for_prompt(events)
+
+    lines = serialized.splitlines()
+    assert len(lines) == 2
+    first = orjson.loads(lines[0])
+    assert first["id"] == 0
+    assert first["entities"] == ["Gül Yapı A.Ş.", "Hasan Çelik", "Tanık 0", "Tanık 1", "Tanık 2", "Tanık 3"]
+
+
+def test_contradictions_are_streamed_before_the_final_result(monkeypatch) -> None:
+    result_json = orjson.dumps({
+        "contradictions": [
+            {
+                "title": "Celiski",
+                "contradiction_type": "TIMELINE_IMPOSSIBILITY",
+                "description": "Sira hatasi.",
+                "involved_event_ids": [1, 5],
+                "severity": "HIGH",
+                "confidence_score": 0.9,
+                "legal_basis": None,
+                "recommended_action": None,
+            }
+        ],
+        "total_contradictions_found": 1,
+        "risk_level": "HIGH",
+        "analysis_notes": None,
+    }).decode()
+
+    async def fake_completion(messages, resolved_model, **kwargs):
+        assert kwargs == {"stream": True}
+
+        async def chunks():
+            for i in range(0, len(result_json), 9):
+                delta = SimpleNamespace(content=result_json[i:i + 9])
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+
+        return chunks()
+
+    monkeypatch.setattr(logic_analyzer, "_create_completion", fake_completion)
+    events = [
+        TimelineEvent(date=f"202{n}", description="Olay", source_page=1, category="Diğer")
+        for n in range(3)
+    ]
+    timeline = TimelineResponse(events=events, document_summary="Ozet.", total_events_found=3)
+
+    async def collect():
+        return [item async for item in logic_analyzer.detect_contradictions_stream(timeline, "gpt-4.1")]
+
+    streamed, final = asyncio.run(collect())
+
+    assert isinstance(streamed, Contradiction)
+    assert streamed.involved_event_ids == [1]
+    assert isinstance(final, LogicAnalysisResult)
+    assert final.contradictions == [streamed]
@@ -0,0 +1,50 @@
+from pathlib import Path
+
+from services.pdf_parser import _clean_block_text, build_prompt_text, extract_text_by_page
+
+SAMPLE_PDF = Path(__file__).resolve().parent.parent / "docs" / "samples" / "lex-sample-case.pdf"
+
+
+def test_build_prompt_text_returns_everything_under_budget() -> None:
+    pages = [(1, "[SAYFA 1]\nbir"), (2, "[SAYFA 2]\niki")]
+    assert build_prompt_text(pages, max_chars=1000) == "[SAYFA 1]\nbir\n\n[SAYFA 2]\niki"
+
+
+def test_build_prompt_text_keeps_event_dense_pages_in_order() -> None:
+    filler = "lorem ipsum dolor sit amet " * 8
+    pages = [
+        (1, "[SAYFA 1]\n12.03.2021 tarihinde davacı dava dilekçesini mahkemeye sundu. " + filler[:60]),
+        (2, "[SAYFA 2]\n" + filler),
+        (3, "[SAYFA 3]\n" + filler),
+        (4, "[SAYFA 4]\nMahkeme 05.06.2022 tarihli duruşmada tanık ifadesini aldı ve karar verdi."),
+    ]
+    text = build_prompt_text(pages, max_chars=300)
+
+    assert text.index("[SAYFA 1]") < text.index("[SAYFA 4]")
+    assert "[SAYFA 2]" not in text and "[SAYFA 3]" not in text
+    assert "Dahil edilmeyen sayfalar: 2-3." in text
+
+
+def test_extract_text_by_page_stops_at_max_pages() -> None:
+    pages = extract_text_by_page(SAMPLE_PDF.read_bytes(), max_pages=1)
+
+    assert [page_number for page_number, _ in pages] == [1]
+
+
+def test_block_text_is_compacted_without_touching_dashes_and_ranges() -> None:
+    raw = (
+        "Davacı   vekili\tbilirki-\nşi raporuna\n\n   itiraz etti.\n"
+        "- Davalı: Hasan Çelik\n2019-\n2020 dönemi"
+    )
+    assert _clean_block_text(raw) == (
+        "Davacı vekili bilirkişi raporuna\nitiraz etti.\n- Davalı: Hasan Çelik\n2019-\n2020 dönemi"
+    )
+
+
+def test_build_prompt_text_hard_cuts_when_no_page_fits() -> None:
+    pages = [(1, "[SAYFA 1]\n" + "a" * 40), (2, "[SAYFA 2]\n" + "b" * 40)]
+    full_text = "\n\n".join(text for _, text in pages)
+
+    text = build_prompt_text(pages, max_chars=30)
+
+    assert text.startswith(full_text[:30] + "\n\n[UYARI:")
@@ -1,5 +1,14 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import pytest
+from openai import BadRequestError, InternalServerError, RateLimitError
+
 import services.llm_extractor as llm_extractor
 import services.logic_analyzer as logic_analyzer
+from models import TimelineEvent, TimelineResponse
+from services.openai_client import AzureConfig, should_fallback_to_json_object
 
 
 def _assert_strict_json_schema(response_format: dict) -> None:
@@ -16,3 +25,53 @@ def test_timeline_response_format_is_strict_json_schema() -> None:
 def test_logic_response_format_is_strict_json_schema() -> None:
     response_format = logic_analyzer._build_structured_response_format()
     _assert_strict_json_schema(response_format)
+
+
+def _api_error(cls, status_code: int, message: str, code=None):
+    request = httpx.Request("POST", "https://example.invalid/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return cls(message, response=response, body={"code": code, "message": message})
+
+
+def test_json_schema_rejection_falls_back_to_json_object() -> None:
+    assert should_fallback_to_json_object(
+        _api_error(BadRequestError, 400, "response_format 'json_schema' is not supported")
+    )
+    assert should_fallback_to_json_object(
+        _api_error(BadRequestError, 400, "Bad value", code="unsupported_parameter")
+    )
+    assert not should_fallback_to_json_object(
+        _api_error(BadRequestError, 400, "This model's maximum context length is 128000 tokens")
+    )
+    assert not should_fallback_to_json_object(
+        _api_error(RateLimitError, 429, "Requests to this operation are unsupported right now")
+    )
+    assert not should_fallback_to_json_object(
+        _api_error(InternalServerError, 500, "response_format handler crashed")
+    )
+
+
+def test_logic_analysis_sends_its_own_prompt_cache_key(monkeypatch) -> None:
+    sent = []
+
+    class FakeCompletions:
+        async def create(self, **kwargs):
+            sent.append(kwargs)
+            raise RuntimeError("stop after the request")
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    config = AzureConfig("key", "https://x", "v", "gpt-4.1", prompt_cache_key=True)
+    monkeypatch.setattr(logic_analyzer, "get_openai_client", lambda: fake_client)
+    monkeypatch.setattr(logic_analyzer, "get_azure_config", lambda: config)
+    events = [
+        TimelineEvent(date=f"202{n}", description="Olay", source_page=1, category="Diğer")
+        for n in range(2)
+    ]
+    timeline = TimelineResponse(events=events, document_summary="Ozet.", total_events_found=2)
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(logic_analyzer.detect_contradictions(timeline))
+
+    assert sent[0]["messages"][0] is logic_analyzer._SYSTEM_MESSAGE
+    assert sent[0]["extra_body"] == {"prompt_cache_key": logic_analyzer._PROMPT_CACHE_KEY}
+    assert logic_analyzer._PROMPT_CACHE_KEY != llm_extractor._PROMPT_CACHE_KEY
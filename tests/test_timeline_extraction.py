@@ -0,0 +1,311 @@
+import asyncio
+from types import SimpleNamespace
+
+import httpx
+import orjson
+import pytest
+from openai import BadRequestError
+
+from models import TimelineEvent, TimelineResponse
+from services import cache, llm_extractor, openai_client
+from services.json_stream import ArrayItemScanner
+
+
+@pytest.fixture(autouse=True)
+def _empty_result_cache() -> None:
+    llm_extractor._result_cache.clear()
+
+
+def test_concurrent_identical_extractions_share_one_call(monkeypatch) -> None:
+    calls = 0
+
+    async def fake_request(document_text, resolved_model, temperature):
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return TimelineResponse(events=[], document_summary="Ozet.", total_events_found=0)
+
+    monkeypatch.setattr(llm_extractor, "_request_timeline", fake_request)
+
+    async def run():
+        return await asyncio.gather(
+            llm_extractor.extract_timeline("ayni metin"),
+            llm_extractor.extract_timeline("ayni metin"),
+            llm_extractor.extract_timeline("baska metin"),
+        )
+
+    first, second, other = asyncio.run(run())
+    assert calls == 2
+    assert first is second
+    assert other is not first
+    assert not llm_extractor._inflight
+
+
+def test_event_stream_scanner_emits_events_across_chunk_boundaries() -> None:
+    payload = (
+        '{"document_summary": "events: [ {not} ]", "events": ['
+        '{"date": "2021", "description": "A \\"quoted\\" {brace}", "source_page": 1,'
+        ' "entities": ["X"], "category": "Diğer", "significance": null},'
+        ' {"date": "2022", "description": "B ]", "source_page": 2,'
+        ' "entities": [], "category": "Diğer", "significance": null}'
+        '], "total_events_found": 2, "primary_jurisdiction": null, "case_number": null}'
+    )
+    scanner = ArrayItemScanner("events")
+    emitted = []
+    for i in range(0, len(payload), 7):
+        emitted.extend(scanner.feed(payload[i:i + 7]))
+
+    events = [TimelineEvent.model_validate_json(raw) for raw in emitted]
+    assert [event.date for event in events] == ["2021", "2022"]
+    assert events[0].description == 'A "quoted" {brace}'
+    assert scanner.text == payload
+
+
+def test_long_documents_are_extracted_in_page_chunks_and_merged(monkeypatch) -> None:
+    monkeypatch.setattr(llm_extractor, "CHUNKED_EXTRACTION_MIN_CHARS", 50)
+    monkeypatch.setattr(llm_extractor, "CHUNK_TARGET_CHARS", 40)
+    chunks_seen = []
+
+    async def fake_chunk(document_text, resolved_model, temperature):
+        chunks_seen.append(document_text)
+        page = int(document_text.split("]")[0].split()[-1])
+        return TimelineResponse(
+            events=[
+                TimelineEvent(date=f"202{4 - page}", description="Ortak olay", source_page=page, category="Diğer"),
+                TimelineEvent(date="2020", description="Tekrar eden olay", source_page=page, category="Diğer"),
+            ],
+            document_summary=f"Ozet {page}.",
+            total_events_found=2,
+            case_number="2020/1" if page == 2 else None,
+        )
+
+    async def fake_summaries(summaries, resolved_model):
+        return " + ".join(summaries)
+
+    monkeypatch.setattr(llm_extractor, "_extract_chunk", fake_chunk)
+    monkeypatch.setattr(llm_extractor, "_merge_summaries", fake_summaries)
+
+    text = "\n\n".join(f"[SAYFA {n}]\n" + "yıl 2020 " * 3 for n in (1, 2, 3))
+    result = asyncio.run(llm_extractor._request_timeline(text, "gpt-4.1", 0.0))
+
+    assert len(chunks_seen) == 3
+    assert [event.date for event in result.events] == ["2020", "2021", "2022", "2023"]
+    assert result.total_events_found == 4
+    assert result.document_summary == "Ozet 1. + Ozet 2. + Ozet 3."
+    assert result.case_number == "2020/1"
+
+
+def test_extraction_calls_share_a_byte_identical_system_prefix() -> None:
+    first = llm_extractor._build_messages("birinci belge")
+    second = llm_extractor._build_messages("ikinci belge")
+
+    assert first[0] is second[0] is llm_extractor._SYSTEM_MESSAGE
+    assert first[0]["content"] == llm_extractor.SYSTEM_PROMPT
+    assert first[1]["content"][1]["text"] == "birinci belge"
+
+
+def test_json_schema_rejection_is_remembered_per_deployment(monkeypatch) -> None:
+    formats = []
+
+    class FakeCompletions:
+        async def create(self, *, response_format, **kwargs):
+            formats.append(response_format["type"])
+            if response_format["type"] == "json_schema":
+                request = httpx.Request("POST", "https://example.invalid")
+                raise BadRequestError(
+                    "response_format json_schema is not supported",
+                    response=httpx.Response(400, request=request),
+                    body=None,
+                )
+            return "ok"
+
+    class FakeClient:
+        class chat:
+            completions = FakeCompletions()
+
+    monkeypatch.setattr(openai_client, "_json_schema_unsupported", set())
+    monkeypatch.setattr(llm_extractor, "get_openai_client", lambda: FakeClient())
+
+    async def run():
+        for _ in range(2):
+            await llm_extractor._create_completion([], "eski-dagitim", 0.0)
+
+    asyncio.run(run())
+    assert formats == ["json_schema", "json_object", "json_object"]
+
+
+def test_batch_extraction_is_bounded_ordered_and_isolates_failures(monkeypatch) -> None:
+    active = peak = 0
+
+    async def fake_request(document_text, resolved_model, temperature):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if document_text == "bozuk":
+            raise ValueError("OpenAI returned malformed JSON")
+        return TimelineResponse(events=[], document_summary=document_text, total_events_found=0)
+
+    monkeypatch.setattr(llm_extractor, "_request_timeline", fake_request)
+
+    documents = [f"belge {i}" for i in range(5)] + ["bozuk"]
+    results = asyncio.run(llm_extractor.extract_timelines(documents, max_concurrency=2))
+
+    assert peak == 2
+    assert [r.document_summary for r in results[:5]] == documents[:5]
+    assert isinstance(results[5], ValueError)
+
+
+def test_documents_without_dates_skip_the_api(monkeypatch) -> None:
+    def no_client():
+        raise AssertionError("OpenAI must not be called")
+
+    monkeypatch.setattr(llm_extractor, "get_openai_client", no_client)
+
+    timeline = asyncio.run(
+        llm_extractor._request_timeline("[SAYFA 1]\nTaraflar uzlaştı.", "gpt-4.1", 0.0)
+    )
+
+    assert timeline.events == []
+    assert timeline.document_summary == llm_extractor.NO_DATES_SUMMARY
+    assert llm_extractor._DATE_HINT_RE.search("Dava 12.03.2021 tarihinde açıldı.")
+    assert llm_extractor._DATE_HINT_RE.search("Sözleşme 2019 yılında imzalandı.")
+
+
+def test_result_caches_serve_repeat_extractions(monkeypatch, tmp_path) -> None:
+    calls = 0
+
+    async def fake_request(document_text, resolved_model, temperature):
+        nonlocal calls
+        calls += 1
+        return TimelineResponse(events=[], document_summary="Ozet.", total_events_found=0)
+
+    monkeypatch.setenv("LEXTIMELINE_CACHE_DIR", str(tmp_path))
+    monkeypatch.setattr(llm_extractor, "_request_timeline", fake_request)
+
+    first = asyncio.run(llm_extractor.extract_timeline("kalici metin"))
+    from_memory = asyncio.run(llm_extractor.extract_timeline("kalici metin"))
+    llm_extractor._result_cache.clear()  # as after a restart
+    from_disk = asyncio.run(llm_extractor.extract_timeline("kalici metin"))
+    asyncio.run(llm_extractor.extract_timeline("kalici metin", model="baska-model"))
+
+    assert calls == 2
+    assert from_memory is first
+    assert from_disk == first
+    assert len(list(tmp_path.glob("*.json"))) == 2
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+def test_failed_disk_cache_write_leaves_no_temp_file(monkeypatch, tmp_path) -> None:
+    def failing_replace(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(cache.os, "replace", failing_replace)
+    value = TimelineResponse(events=[], document_summary="Ozet.", total_events_found=0)
+
+    cache.write_disk_cache(tmp_path / "anahtar.json", value)
+
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_batch_api_results_are_routed_back_by_custom_id(monkeypatch) -> None:
+    timeline_json = TimelineResponse(
+        events=[], document_summary="Toplu ozet.", total_events_found=0
+    ).model_dump_json()
+    submitted = {}
+
+    def output_line(custom_id, status_code, content):
+        body = {"choices": [{"message": {"content": content}}]}
+        return orjson.dumps({
+            "custom_id": custom_id,
+            "response": {"status_code": status_code, "body": body},
+            "error": None,
+        })
+
+    class FakeFiles:
+        async def create(self, *, file, purpose):
+            submitted["lines"] = [orjson.loads(line) for line in file[1].splitlines()]
+            return SimpleNamespace(id="file-in")
+
+        async def content(self, file_id):
+            lines = [output_line("2", 200, "{bozuk"), output_line("0", 200, timeline_json)]
+            return SimpleNamespace(read=lambda: b"\n".join(lines))
+
+    class FakeBatches:
+        async def create(self, **kwargs):
+            return SimpleNamespace(id="batch-1", status="validating")
+
+        async def retrieve(self, batch_id):
+            return SimpleNamespace(
+                id=batch_id, status="completed", output_file_id="file-out", error_file_id=None
+            )
+
+    fake_client = SimpleNamespace(files=FakeFiles(), batches=FakeBatches())
+    monkeypatch.setattr(llm_extractor, "get_openai_client", lambda: fake_client)
+
+    documents = ["Dava 2020 yilinda acildi.", "Tarihsiz metin.", "Karar 2021 yilinda verildi."]
+    results = asyncio.run(
+        llm_extractor.extract_timelines_batch(documents, model="toplu", poll_interval=0)
+    )
+
+    assert [line["custom_id"] for line in submitted["lines"]] == ["0", "2"]
+    assert results[0].document_summary == "Toplu ozet."
+    assert results[1].document_summary == llm_extractor.NO_DATES_SUMMARY
+    assert isinstance(results[2], ValueError)
+
+
+def test_batch_extraction_concurrency_defaults_to_llm_concurrency(monkeypatch) -> None:
+    active = peak = 0
+
+    async def fake_request(document_text, resolved_model, temperature):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        return TimelineResponse(events=[], document_summary="Ozet.", total_events_found=0)
+
+    monkeypatch.setattr(openai_client, "_config", None)
+    monkeypatch.setenv("LLM_CONCURRENCY", "3")
+    monkeypatch.setattr(llm_extractor, "_request_timeline", fake_request)
+
+    asyncio.run(llm_extractor.extract_timelines([f"belge {i}" for i in range(8)]))
+
+    assert peak == 3
+
+
+@pytest.mark.parametrize("value", ["0", "-2", "dort"])
+def test_invalid_llm_concurrency_is_rejected_up_front(monkeypatch, value) -> None:
+    monkeypatch.setattr(openai_client, "_config", None)
+    monkeypatch.setenv("LLM_CONCURRENCY", value)
+
+    with pytest.raises(ValueError, match="LLM_CONCURRENCY"):
+        openai_client.get_azure_config()
+
+
+def test_prompt_cache_key_is_sent_only_when_enabled(monkeypatch) -> None:
+    sent = []
+
+    class FakeCompletions:
+        async def create(self, **kwargs):
+            sent.append(kwargs.get("extra_body"))
+            return "ok"
+
+    fake_client = SimpleNamespace(chat=SimpleNamespace(completions=FakeCompletions()))
+    monkeypatch.setattr(llm_extractor, "get_openai_client", lambda: fake_client)
+    for enabled in (False, True):
+        config = openai_client.AzureConfig("key", "https://x", "v", "gpt-4.1", prompt_cache_key=enabled)
+        monkeypatch.setattr(llm_extractor, "get_azure_config", lambda: config)
+        asyncio.run(llm_extractor._create_completion([], "gpt-4.1", 0.0))
+
+    assert sent == [None, {"prompt_cache_key": llm_extractor._PROMPT_CACHE_KEY}]
+
+
+def test_invalid_response_is_not_echoed_into_logs_or_errors(caplog) -> None:
+    secret = "Davaci Ahmet Yilmaz 12.03.2021 tarihinde"
+    for raw in ('{"events": [{"description": "%s"' % secret, '{"events": "%s"}' % secret):
+        with pytest.raises(ValueError) as excinfo:
+            llm_extractor._parse_and_validate(raw)
+        assert secret not in str(excinfo.value)
+    assert secret not in caplog.text